@@ -1,19 +1,50 @@
 import sqlite3
 import re
 from flask import Flask, render_template, request, url_for, redirect, session, jsonify
-from flask import flash, get_flashed_messages
-from werkzeug.security import check_password_hash, generate_password_hash
-from datetime import date
+from flask import flash, get_flashed_messages, g, has_app_context, has_request_context, get_template_attribute
+from flask import send_from_directory, make_response
+from markupsafe import Markup, escape
+from werkzeug.security import check_password_hash, generate_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from datetime import date, datetime, timedelta
 import os
-from werkzeug.utils import secure_filename
 import time
+import math
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 from dotenv import load_dotenv
 from apscheduler.schedulers.background import BackgroundScheduler
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # without Pillow no derivatives are made and originals are shown
+    Image = None
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
 import atexit
+import click
+import threading
+import queue
+import hashlib
+import csv
+import io
+import heapq
+import random
+import uuid
+import json
+import tempfile
+import gzip
+import zlib
+import base64
+import hmac
+import socket
+import functools
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+import multiprocessing
 
 # Load environment variables from .env file
 load_dotenv()
@@ -28,14 +59,88 @@ MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB max file size
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+app.config['THUMBNAIL_SIZE'] = (320, 320)
+app.config['PREVIEW_SIZE'] = (1280, 1280)
+app.config['UPLOAD_GC_GRACE_SECONDS'] = int(os.environ.get('UPLOAD_GC_GRACE_SECONDS', 3600))
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+app.config['COMPRESS_GZIP_LEVEL'] = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+app.config['COMPRESS_BROTLI_QUALITY'] = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+app.config['ADMIN_PAGE_SIZE'] = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+
+# Archive configuration (Completed requests older than this move to requests_archive)
+app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', 180))
+app.config['ARCHIVE_BATCH_SIZE'] = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+
+# Scheduler configuration (a process that dies mid-job loses its lease after this long)
+app.config['JOB_LEASE_SECONDS'] = int(os.environ.get('JOB_LEASE_SECONDS', 900))
+
+# Password hashing configuration
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+app.config['PASSWORD_HASH_QUEUE_LIMIT'] = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', 32))
+app.config['PASSWORD_HASH_TIMEOUT_SECONDS'] = int(os.environ.get('PASSWORD_HASH_TIMEOUT_SECONDS', 10))
+
+# Database configuration
+app.config['DATABASE'] = os.environ.get('DATABASE', 'database.db')
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+app.config['DB_BUSY_TIMEOUT_MS'] = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+app.config['DB_CACHE_SIZE_KB'] = int(os.environ.get('DB_CACHE_SIZE_KB', 16384))
+app.config['DB_MMAP_SIZE'] = int(os.environ.get('DB_MMAP_SIZE', 128 * 1024 * 1024))
+app.config['DB_STATEMENT_CACHE_SIZE'] = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 256))
+app.config['DB_OPTIMIZE_INTERVAL_SECONDS'] = int(os.environ.get('DB_OPTIMIZE_INTERVAL_SECONDS', 3600))
+
+# Slow query log configuration
+app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+app.config['SLOW_QUERY_LOG'] = os.environ.get('SLOW_QUERY_LOG', 'slow_queries.jsonl')
+app.config['SLOW_QUERY_LOG_MAX_BYTES'] = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
 
 # Email configuration
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
+app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
+app.config['MAIL_TIMEOUT'] = int(os.environ.get('MAIL_TIMEOUT', 30))
 app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME', 'your_email@gmail.com')
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD', 'your_app_password_here')
 
+# SMTP connection pool configuration
+app.config['MAIL_POOL_SIZE'] = int(os.environ.get('MAIL_POOL_SIZE', 4))
+app.config['MAIL_MAX_MESSAGES_PER_CONNECTION'] = int(os.environ.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100))
+app.config['MAIL_KEEPALIVE_SECONDS'] = int(os.environ.get('MAIL_KEEPALIVE_SECONDS', 30))
+app.config['MAIL_MAX_IDLE_SECONDS'] = int(os.environ.get('MAIL_MAX_IDLE_SECONDS', 240))
+
+# Email outbox configuration
+app.config['EMAIL_DISPATCH_INTERVAL_SECONDS'] = int(os.environ.get('EMAIL_DISPATCH_INTERVAL_SECONDS', 15))
+app.config['EMAIL_DISPATCH_BATCH_SIZE'] = int(os.environ.get('EMAIL_DISPATCH_BATCH_SIZE', 50))
+app.config['EMAIL_MAX_ATTEMPTS'] = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6))
+app.config['EMAIL_RETRY_BASE_SECONDS'] = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 60))
+app.config['EMAIL_RETRY_MAX_SECONDS'] = int(os.environ.get('EMAIL_RETRY_MAX_SECONDS', 3600))
+app.config['EMAIL_SEND_LEASE_SECONDS'] = int(os.environ.get('EMAIL_SEND_LEASE_SECONDS', 300))
+
+# Email body storage and retention (0 days keeps notifications forever)
+app.config['EMAIL_BODY_COMPRESSION'] = os.environ.get('EMAIL_BODY_COMPRESSION', 'true').lower() == 'true'
+app.config['EMAIL_BODY_COMPRESS_MIN_BYTES'] = int(os.environ.get('EMAIL_BODY_COMPRESS_MIN_BYTES', 512))
+app.config['EMAIL_RETENTION_DAYS'] = int(os.environ.get('EMAIL_RETENTION_DAYS', 365))
+app.config['EMAIL_RETENTION_BATCH_SIZE'] = int(os.environ.get('EMAIL_RETENTION_BATCH_SIZE', 1000))
+
+# Broadcast configuration (lost item announcements to every student)
+app.config['BROADCAST_BATCH_SIZE'] = int(os.environ.get('BROADCAST_BATCH_SIZE', 200))
+app.config['BROADCAST_CONNECTIONS'] = int(os.environ.get('BROADCAST_CONNECTIONS', 3))
+
+# Live update stream configuration
+app.config['LIVE_EVENTS_MAX_CONNECTIONS'] = int(os.environ.get('LIVE_EVENTS_MAX_CONNECTIONS', 50))
+app.config['LIVE_EVENTS_POLL_SECONDS'] = float(os.environ.get('LIVE_EVENTS_POLL_SECONDS', 1))
+app.config['LIVE_EVENTS_HEARTBEAT_SECONDS'] = int(os.environ.get('LIVE_EVENTS_HEARTBEAT_SECONDS', 15))
+app.config['LIVE_EVENTS_RETRY_MS'] = int(os.environ.get('LIVE_EVENTS_RETRY_MS', 5000))
+app.config['LIVE_EVENTS_REPLAY_LIMIT'] = int(os.environ.get('LIVE_EVENTS_REPLAY_LIMIT', 200))
+app.config['LIVE_EVENTS_RETENTION_SECONDS'] = int(os.environ.get('LIVE_EVENTS_RETENTION_SECONDS', 3600))
+
+# Metrics configuration (one JSON file per live process in METRICS_DIR; scrapes need
+# the bearer token or an admin session)
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR', os.environ.get(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'campuscare-metrics')))
+app.config['METRICS_FLUSH_SECONDS'] = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+
 # Create upload folder if it doesn't exist
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
@@ -44,174 +149,1321 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Metrics
+# Every process keeps its counters, gauges and histograms in memory and writes
+# them to <METRICS_DIR>/<pid>.json every few seconds. /metrics merges the files
+# of all live processes, so gunicorn workers add up to one set of numbers. A
+# process deletes its file on exit, and files left by processes that died are
+# skipped and removed; Prometheus treats the resulting drop as a counter reset.
+# Statement timings are labelled by statement kind only; per-statement detail
+# is in the slow query log.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+SIZE_BUCKETS = (16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216)
+
+METRIC_DEFINITIONS = {
+    # name: (type, help, histogram buckets)
+    'campuscare_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status', None),
+    'campuscare_http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint', LATENCY_BUCKETS),
+    'campuscare_db_query_duration_seconds': ('histogram', 'SQL statement duration by statement kind', QUERY_BUCKETS),
+    'campuscare_smtp_connect_duration_seconds': ('histogram', 'Time to connect and log in to the SMTP server', LATENCY_BUCKETS),
+    'campuscare_smtp_send_duration_seconds': ('histogram', 'Time to send one message over a pooled connection', LATENCY_BUCKETS),
+    'campuscare_smtp_failures_total': ('counter', 'SMTP failures by stage (connect or send)', None),
+    'campuscare_upload_size_bytes': ('histogram', 'Size of uploaded files', SIZE_BUCKETS),
+    'campuscare_upload_save_duration_seconds': ('histogram', 'Time to hash and store an upload', LATENCY_BUCKETS),
+    'campuscare_upload_deduplicated_total': ('counter', 'Uploads whose content was already stored', None),
+    'campuscare_job_duration_seconds': ('histogram', 'Scheduler job runtime', LATENCY_BUCKETS),
+    'campuscare_job_runs_total': ('counter', 'Scheduler job runs by outcome', None),
+    'campuscare_job_skipped_total': ('counter', 'Scheduler job runs skipped because another process ran or is running the job', None),
+    'campuscare_job_lease_lost_total': ('counter', 'Scheduler job runs that outlived their lease', None),
+    'campuscare_roster_cache_lookups_total': ('counter', 'Worker roster lookups served from memory (hit) or after a reload (miss)', None),
+    'campuscare_password_hash_duration_seconds': ('histogram', 'Password hash or check time including queueing', LATENCY_BUCKETS),
+    'campuscare_password_hash_rejected_total': ('counter', 'Password hashes refused because the queue was full', None),
+    'campuscare_password_hash_in_flight': ('gauge', 'Password hashes queued or running', None),
+    'campuscare_live_event_connections': ('gauge', 'Open /events streams', None),
+}
+
+class MetricsCollector:
+    """Per-process metric store, flushed to a JSON file for cross-process aggregation"""
+
+    def __init__(self, directory, flush_interval):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._closed = False
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._flusher = None
+
+    def _check_process(self):
+        # A forked child starts with an empty store and its own file
+        if self._pid != os.getpid():
+            self._reset()
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._flusher.start()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def inc(self, name, labels=None, value=1):
+        with self._lock:
+            self._check_process()
+            key = self._key(name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, labels=None):
+        with self._lock:
+            self._check_process()
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, labels=None):
+        buckets = METRIC_DEFINITIONS[name][2]
+        with self._lock:
+            self._check_process()
+            key = self._key(name, labels)
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def timer(self, name, labels=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, labels)
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def flush(self):
+        with self._lock:
+            if self._pid != os.getpid() or self._closed:
+                return
+            snapshot = {
+                'pid': self._pid,
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self._gauges.items()],
+                'histograms': [[name, list(labels), series] for (name, labels), series in self._histograms.items()],
+            }
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(snapshot['pid'])
+        with open(path + '.tmp', 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(path + '.tmp', path)
+
+    def close(self):
+        """Stop flushing and remove this process's file; run at exit"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._closed = True
+        try:
+            os.remove(self._path(self._pid))
+        except FileNotFoundError:
+            pass
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Could not write metrics: {e}")
+
+    def collect(self):
+        """Merge the files of all processes into (counters, gauges, histograms)"""
+        self.flush()
+        os.makedirs(self.directory, exist_ok=True)
+        counters, gauges, histograms = {}, {}, {}
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            pid = entry.name[:-len('.json')]
+            if pid.isdigit() and not process_alive(int(pid)):
+                try:
+                    os.remove(entry.path)  # left behind by a process that did not exit cleanly
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                with open(entry.path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, value in snapshot['gauges']:
+                key = (name, tuple(map(tuple, labels)))
+                gauges[key] = gauges.get(key, 0) + value
+            for name, labels, series in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(series))
+                for i, value in enumerate(series):
+                    merged[i] += value
+        return counters, gauges, histograms
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+def render_metrics():
+    """Prometheus text exposition of the merged metrics"""
+    counters, gauges, histograms = metrics.collect()
+    series_by_name = {}
+    for store in (counters, gauges, histograms):
+        for (name, labels), value in store.items():
+            series_by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRIC_DEFINITIONS.items():
+        if name not in series_by_name:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series_by_name[name]):
+            if kind != 'histogram':
+                lines.append(f"{name}{format_labels(labels)} {value}")
+                continue
+            for bound, count in zip(buckets, value):
+                lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {value[-1]}")
+            lines.append(f"{name}_sum{format_labels(labels)} {value[-2]}")
+            lines.append(f"{name}_count{format_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+@functools.lru_cache(maxsize=2048)
+def normalize_sql(query):
+    """SQL with literals replaced by ? and whitespace collapsed, used to group statements"""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", query)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\?(?:\s*,\s*\?)+", "?, ...", sql)  # IN lists of any length
+    return " ".join(sql.split()).rstrip(";")
+
+@functools.lru_cache(maxsize=2048)
+def statement_kind(query):
+    """select, insert, update, delete or other: the only label of the statement timings"""
+    words = query.split(None, 1)
+    kind = words[0].lower() if words else ''
+    return kind if kind in ('select', 'insert', 'update', 'delete') else 'other'
+
+@functools.lru_cache(maxsize=2048)
+def sql_fingerprint(query):
+    return hashlib.sha1(normalize_sql(query).encode()).hexdigest()[:12]
+
+def timed_job(func):
+    """Wrap a scheduler job so its runtime and outcome are recorded"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        labels = {'job': func.__name__}
+        started = time.perf_counter()
+        outcome = 'error'
+        _query_source.name = func.__name__
+        try:
+            result = func(*args, **kwargs)
+            outcome = 'success'
+            return result
+        finally:
+            _query_source.name = None
+            metrics.observe('campuscare_job_duration_seconds', time.perf_counter() - started, labels)
+            metrics.inc('campuscare_job_runs_total', {**labels, 'outcome': outcome})
+    return wrapper
+
+metrics = MetricsCollector(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_SECONDS'])
+atexit.register(metrics.close)
+
 # Database setup
-def get_db_connection():
-    conn = sqlite3.connect('database.db')
+# Connections are opened once, tuned, and then reused. Inside a request (or an
+# app context such as a scheduler job) a connection is checked out of the pool
+# on first use and returned at teardown. Code running outside an app context
+# keeps one connection per thread. Planner statistics are kept current by
+# PRAGMA optimize, run on a returned connection once an interval and before a
+# connection is closed; it re-analyzes the tables that connection queried when
+# they have no statistics or have grown well past them.
+_db_pool = queue.LifoQueue()
+_db_local = threading.local()
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection that tracks open db_transaction() blocks and times every statement"""
+    transaction_depth = 0
+    commit_hooks = ()  # callbacks to run once the outermost db_transaction() commits
+    optimized_at = 0.0  # time.monotonic() of the last PRAGMA optimize
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TimedCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def open_db_connection():
+    """Open a new SQLite connection with WAL journaling and tuned pragmas"""
+    conn = sqlite3.connect(
+        app.config['DATABASE'],
+        timeout=app.config['DB_BUSY_TIMEOUT_MS'] / 1000,
+        cached_statements=app.config['DB_STATEMENT_CACHE_SIZE'],
+        check_same_thread=False,  # pooled connections may be handed to another thread
+        factory=PooledConnection
+    )
     conn.row_factory = sqlite3.Row  # This enables name-based access to columns
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")  # safe with WAL, avoids an fsync per commit
+    conn.execute(f"PRAGMA busy_timeout = {app.config['DB_BUSY_TIMEOUT_MS']};")
+    conn.execute(f"PRAGMA cache_size = -{app.config['DB_CACHE_SIZE_KB']};")
+    conn.execute(f"PRAGMA mmap_size = {app.config['DB_MMAP_SIZE']};")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA analysis_limit = 1000;")  # bounds the work of PRAGMA optimize on big tables
+    conn.optimized_at = time.monotonic()
     return conn
 
-# Initialize database
-def init_db():
-    if not os.path.exists('database.db'):
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        
-        # Create users table
-        cursor.execute('''
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL,
-                email TEXT NOT NULL UNIQUE,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL,
-                department TEXT,
-                status TEXT DEFAULT 'Available'
-            )
-        ''')
-        
-        # Create requests table
-        cursor.execute('''
-            CREATE TABLE requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                studentID INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                location TEXT NOT NULL,
-                status TEXT NOT NULL,
-                priority TEXT NOT NULL,
-                description TEXT NOT NULL,
-                date TEXT NOT NULL,
-                workerID INTEGER,
-                notes TEXT,
-                worker_notes TEXT,
-                image_path TEXT,
-                worker_image_path TEXT,
-                department TEXT,
-                FOREIGN KEY (studentID) REFERENCES users (id),
-                FOREIGN KEY (workerID) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create lost_items table
-        cursor.execute('''
-            CREATE TABLE lost_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                studentID INTEGER NOT NULL,
-                item_name TEXT NOT NULL,
-                description TEXT NOT NULL,
-                location_found TEXT NOT NULL,
-                date_found TEXT NOT NULL,
-                image_path TEXT,
-                status TEXT DEFAULT 'Unclaimed',
-                claimed_by INTEGER,
-                date_claimed TEXT,
-                contact_info TEXT,
-                FOREIGN KEY (studentID) REFERENCES users (id),
-                FOREIGN KEY (claimed_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create email_notifications table
-        cursor.execute('''
-            CREATE TABLE email_notifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER,
-                recipient_id INTEGER NOT NULL,
-                subject TEXT NOT NULL,
-                message TEXT NOT NULL,
-                sent_date TEXT NOT NULL,
-                status TEXT DEFAULT 'Sent',
-                FOREIGN KEY (request_id) REFERENCES requests (id),
-                FOREIGN KEY (recipient_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create default admin account with properly hashed password
-        hashed_password = generate_password_hash('admin123')
-        cursor.execute(
-            "INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, ?)",
-            ('Admin', 'admin@campuscare.com', hashed_password, 'Admin')
-        )
-        
-        conn.commit()
+def optimize_db_connection(conn):
+    """Refresh planner statistics for the tables this connection has been querying"""
+    conn.optimized_at = time.monotonic()
+    conn.execute("PRAGMA optimize;")
+
+def _checkout_db_connection():
+    try:
+        return _db_pool.get_nowait()
+    except queue.Empty:
+        return open_db_connection()
+
+def _release_db_connection(conn):
+    """Return a connection to the pool, discarding it if it is broken or the pool is full"""
+    try:
+        conn.transaction_depth = 0
+        conn.commit_hooks = ()
+        if conn.in_transaction:
+            conn.rollback()
+        keep = _db_pool.qsize() < app.config['DB_POOL_SIZE']
+        if not keep or time.monotonic() - conn.optimized_at > app.config['DB_OPTIMIZE_INTERVAL_SECONDS']:
+            optimize_db_connection(conn)
+    except sqlite3.Error:
+        conn.close()
+        return
+    if keep:
+        _db_pool.put(conn)
+    else:
         conn.close()
 
-# Database migration for existing databases
-def migrate_db():
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    
-    # Check if columns already exist
-    cursor.execute("PRAGMA table_info(users)")
-    users_columns = [col[1] for col in cursor.fetchall()]
+def get_db_connection():
+    """Return the pooled connection for the current app context or thread"""
+    if has_app_context():
+        if 'db_conn' not in g:
+            g.db_conn = _checkout_db_connection()
+        return g.db_conn
+
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = open_db_connection()
+        _db_local.conn = conn
+    return conn
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        _release_db_connection(conn)
+
+# Group several execute_query calls into one atomic commit
+@contextmanager
+def db_transaction():
+    conn = get_db_connection()
+    conn.transaction_depth += 1
+    try:
+        yield conn
+    except Exception:
+        conn.transaction_depth -= 1
+        if conn.transaction_depth == 0:
+            conn.commit_hooks = ()
+            conn.rollback()
+        raise
+    conn.transaction_depth -= 1
+    if conn.transaction_depth == 0:
+        try:
+            conn.commit()
+        finally:
+            hooks, conn.commit_hooks = conn.commit_hooks, ()
+        for hook in hooks:
+            hook()
+
+def on_commit(hook):
+    """Run hook after the enclosing db_transaction() commits; it is dropped if the transaction rolls back"""
+    conn = get_db_connection()
+    conn.commit_hooks = (*conn.commit_hooks, hook)
+
+# Query timing and the slow query log
+# Cursors of pooled connections time each statement from execute until its
+# rows have been read (SQLite does most of a query's work while stepping
+# through the rows) and record it under its statement kind. Statements slower
+# than SLOW_QUERY_THRESHOLD_MS are appended to a JSON-lines log with their
+# query plan; /admin/slow-queries aggregates the log.
+_query_source = threading.local()
+_slow_query_lock = threading.Lock()
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's duration and row count to record_query"""
+    _statement = None  # [sql, parameters, seconds, rows] of the statement being read
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._statement = [sql, parameters, time.perf_counter() - started, 0]
+        if self.description is None:  # no result rows to wait for
+            self._statement[3] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._statement = [sql, None, time.perf_counter() - started, max(self.rowcount, 0)]
+        self._finish()
+        return self
+
+    def _timed(self, fetch, *args):
+        started = time.perf_counter()
+        result = fetch(*args)
+        if self._statement is not None:
+            self._statement[2] += time.perf_counter() - started
+        return result
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._statement is not None:
+            self._statement[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        if self._statement is not None:
+            self._statement[3] += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._statement is not None:
+            self._statement[3] += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Statements whose rows were not all read are recorded when the cursor goes away
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            record_query(self.connection, *statement)
+
+def query_source():
+    """Route or scheduler job on whose behalf the current thread runs queries"""
+    if has_request_context():
+        return request.endpoint or request.path
+    return getattr(_query_source, 'name', None) or threading.current_thread().name
+
+def record_query(conn, sql, parameters, seconds, rows):
+    metrics.observe('campuscare_db_query_duration_seconds', seconds, {'statement': statement_kind(sql)})
+    if seconds * 1000 >= app.config['SLOW_QUERY_THRESHOLD_MS']:
+        log_slow_query(conn, sql, parameters, seconds, rows)
+
+def log_slow_query(conn, sql, parameters, seconds, rows):
+    try:
+        plan = explain_query_plan(conn, sql, parameters if parameters is not None else ())
+    except sqlite3.Error:  # e.g. DDL, or a connection that is already closed
+        plan = []
+    entry = {
+        'at': datetime.now().isoformat(timespec='seconds'),
+        'fingerprint': sql_fingerprint(sql),
+        'sql': normalize_sql(sql),
+        'ms': round(seconds * 1000, 2),
+        'params': len(parameters) if parameters is not None else None,
+        'rows': rows,
+        'source': query_source(),
+        'plan': plan,
+        'problems': plan_problems(plan),
+    }
+    path = app.config['SLOW_QUERY_LOG']
+    with _slow_query_lock:
+        try:
+            if os.path.getsize(path) > app.config['SLOW_QUERY_LOG_MAX_BYTES']:
+                os.replace(path, path + '.1')
+        except OSError:
+            pass
+        with open(path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+def slow_query_summary(max_entries=10000):
+    """Aggregate the most recent slow query log entries by fingerprint, costliest first"""
+    path = app.config['SLOW_QUERY_LOG']
+    entries = deque(maxlen=max_entries)
+    for log_file in (path + '.1', path):
+        try:
+            with open(log_file) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:  # a line cut short by a crash
+                        continue
+        except FileNotFoundError:
+            continue
     
-    cursor.execute("PRAGMA table_info(requests)")
-    requests_columns = [col[1] for col in cursor.fetchall()]
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'], 'sql': entry['sql'], 'durations': [],
+            'rows': 0, 'sources': {}, 'last_seen': None, 'plan': [], 'problems': [],
+        })
+        group['durations'].append(entry['ms'])
+        group['rows'] += entry['rows'] or 0
+        group['sources'][entry['source']] = group['sources'].get(entry['source'], 0) + 1
+        group['last_seen'] = entry['at']
+        group['plan'] = entry['plan']
+        group['problems'] = entry['problems']
     
-    cursor.execute("PRAGMA table_info(lost_items)")
-    lost_items_columns = [col[1] for col in cursor.fetchall()]
+    summary = []
+    for group in groups.values():
+        durations = sorted(group.pop('durations'))
+        group['count'] = len(durations)
+        group['total_ms'] = round(sum(durations), 1)
+        group['avg_ms'] = round(group['total_ms'] / len(durations), 1)
+        group['p95_ms'] = durations[int(0.95 * (len(durations) - 1))]
+        group['max_ms'] = durations[-1]
+        group['avg_rows'] = round(group.pop('rows') / len(durations), 1)
+        group['sources'] = sorted(group['sources'].items(), key=lambda item: -item[1])
+        summary.append(group)
+    summary.sort(key=lambda group: -group['total_ms'])
+    return summary, len(entries)
+
+# Schema migrations
+# Every schema change is a numbered migration. Migrations run once, in order,
+# each in its own transaction, and are recorded in the schema_version table.
+# A migration may list query plan checks: queries whose EXPLAIN QUERY PLAN must
+# not fall back to a full table scan or a temporary sort once it is applied.
+# Plans are checked against a data-free copy of the schema so the result does
+# not depend on how many rows the database happens to hold.
+def table_exists(cursor, table):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", [table])
+    return cursor.fetchone() is not None
+
+def add_column_if_missing(cursor, table, column, definition):
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def migration_001_baseline(cursor):
+    # Create users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            department TEXT,
+            status TEXT DEFAULT 'Available'
+        )
+    ''')
     
-    # Add department column to users table if it doesn't exist
-    if 'department' not in users_columns:
-        cursor.execute("ALTER TABLE users ADD COLUMN department TEXT")
+    # Create requests table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            studentID INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            location TEXT NOT NULL,
+            status TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            description TEXT NOT NULL,
+            date TEXT NOT NULL,
+            workerID INTEGER,
+            notes TEXT,
+            worker_notes TEXT,
+            image_path TEXT,
+            worker_image_path TEXT,
+            department TEXT,
+            FOREIGN KEY (studentID) REFERENCES users (id),
+            FOREIGN KEY (workerID) REFERENCES users (id)
+        )
+    ''')
     
-    # Add status column to users table if it doesn't exist
-    if 'status' not in users_columns:
-        cursor.execute("ALTER TABLE users ADD COLUMN status TEXT DEFAULT 'Available'")
+    # Create lost_items table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lost_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            studentID INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            location_found TEXT NOT NULL,
+            date_found TEXT NOT NULL,
+            image_path TEXT,
+            status TEXT DEFAULT 'Unclaimed',
+            claimed_by INTEGER,
+            date_claimed TEXT,
+            contact_info TEXT,
+            FOREIGN KEY (studentID) REFERENCES users (id),
+            FOREIGN KEY (claimed_by) REFERENCES users (id)
+        )
+    ''')
     
-    # Add image_path and department columns to requests table if they don't exist
-    if 'image_path' not in requests_columns:
-        cursor.execute("ALTER TABLE requests ADD COLUMN image_path TEXT")
+    # Create email_notifications table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER,
+            recipient_id INTEGER NOT NULL,
+            subject TEXT NOT NULL,
+            message TEXT NOT NULL,
+            sent_date TEXT NOT NULL,
+            status TEXT DEFAULT 'Sent',
+            broadcast_id INTEGER,
+            FOREIGN KEY (request_id) REFERENCES requests (id),
+            FOREIGN KEY (recipient_id) REFERENCES users (id)
+        )
+    ''')
     
-    if 'worker_image_path' not in requests_columns:
-        cursor.execute("ALTER TABLE requests ADD COLUMN worker_image_path TEXT")
+    # Columns added after the first release
+    add_column_if_missing(cursor, "users", "department", "TEXT")
+    add_column_if_missing(cursor, "users", "status", "TEXT DEFAULT 'Available'")
+    add_column_if_missing(cursor, "requests", "image_path", "TEXT")
+    add_column_if_missing(cursor, "requests", "worker_image_path", "TEXT")
+    add_column_if_missing(cursor, "requests", "department", "TEXT")
+    add_column_if_missing(cursor, "lost_items", "contact_info", "TEXT")
+    add_column_if_missing(cursor, "email_notifications", "broadcast_id", "INTEGER")
     
-    if 'department' not in requests_columns:
-        cursor.execute("ALTER TABLE requests ADD COLUMN department TEXT")
+    # Create broadcasts table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject TEXT NOT NULL,
+            message TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'Queued',
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            locked_until REAL
+        )
+    ''')
     
-    # Add contact_info column to lost_items table if it doesn't exist
-    if 'contact_info' not in lost_items_columns:
-        cursor.execute("ALTER TABLE lost_items ADD COLUMN contact_info TEXT")
+    # Create email_outbox table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            notification_id INTEGER,
+            to_email TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            message TEXT NOT NULL,
+            attachment_path TEXT,
+            status TEXT NOT NULL DEFAULT 'Queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            locked_until REAL,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            sent_at TEXT,
+            FOREIGN KEY (notification_id) REFERENCES email_notifications (id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at);")
     
-    # Create lost_items table if it doesn't exist
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='lost_items';")
+    # Create default admin account with properly hashed password
+    cursor.execute("SELECT id FROM users WHERE role = 'Admin' LIMIT 1;")
     if not cursor.fetchone():
-        cursor.execute('''
-            CREATE TABLE lost_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                studentID INTEGER NOT NULL,
-                item_name TEXT NOT NULL,
-                description TEXT NOT NULL,
-                location_found TEXT NOT NULL,
-                date_found TEXT NOT NULL,
-                image_path TEXT,
-                status TEXT DEFAULT 'Unclaimed',
-                claimed_by INTEGER,
-                date_claimed TEXT,
-                contact_info TEXT,
-                FOREIGN KEY (studentID) REFERENCES users (id),
-                FOREIGN KEY (claimed_by) REFERENCES users (id)
-            )
-        ''')
+        hashed_password = generate_password_hash('admin123', app.config['PASSWORD_HASH_METHOD'])
+        cursor.execute(
+            "INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, ?)",
+            ('Admin', 'admin@campuscare.com', hashed_password, 'Admin')
+        )
+
+def migration_002_query_indexes(cursor):
+    # Student dashboard: WHERE studentID = ? ORDER BY date
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_student_date ON requests (studentID, date, id);")
+    # Worker dashboard: WHERE workerID = ? ORDER BY date
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_worker_date ON requests (workerID, date, id);")
+    # Open task counts per worker, answered from the index alone
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_worker_status ON requests (workerID, status);")
+    # Status counts such as status = 'Pending'
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_status ON requests (status);")
+    # Admin listing: ORDER BY date DESC, id DESC with keyset pagination
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_date_id ON requests (date, id);")
+    # Logins: WHERE email = ? AND role = ?
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email_role ON users (email, role);")
+    # Worker rosters: WHERE role = 'Worker' AND department = ?
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_role_department ON users (role, department);")
+    # Lost & found listing: ORDER BY date_found
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lost_items_date_found_id ON lost_items (date_found, id);")
+    # Notifications page: ORDER BY sent_date, id
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_notifications_sent_date ON email_notifications (sent_date, id);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_notifications_request ON email_notifications (request_id);")
+    # Broadcast sender: WHERE broadcast_id = ? AND status = 'Queued' AND id > ?
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_notifications_broadcast ON email_notifications (broadcast_id, status, id);")
     
-    # Create email_notifications table if it doesn't exist
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='email_notifications';")
-    if not cursor.fetchone():
-        cursor.execute('''
-            CREATE TABLE email_notifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER,
-                recipient_id INTEGER NOT NULL,
-                subject TEXT NOT NULL,
-                message TEXT NOT NULL,
-                sent_date TEXT NOT NULL,
-                status TEXT DEFAULT 'Sent',
-                FOREIGN KEY (request_id) REFERENCES requests (id),
-                FOREIGN KEY (recipient_id) REFERENCES users (id)
+    # Single-column indexes made redundant by the composites above
+    for index in ["idx_requests_studentID", "idx_requests_workerID", "idx_requests_date",
+                  "idx_lost_items_date_found", "idx_users_email", "idx_users_role"]:
+        cursor.execute(f"DROP INDEX IF EXISTS {index};")
+
+# Request counters
+# request_counters holds the number of requests per status for the whole
+# campus, each student, each department and each worker. Triggers on requests
+# keep it current, so dashboards read a handful of rows instead of counting.
+COUNTER_SCOPES = [
+    # (scope, expression for scope_id, condition for the row to be counted)
+    ('global', "''", "1"),
+    ('student', "{row}.studentID", "{row}.studentID IS NOT NULL"),
+    ('department', "{row}.department", "{row}.department IS NOT NULL"),
+    ('worker', "{row}.workerID", "{row}.workerID IS NOT NULL"),
+]
+
+def counter_trigger_statements(row, delta):
+    statements = []
+    for scope, scope_id, condition in COUNTER_SCOPES:
+        scope_id = scope_id.format(row=row)
+        condition = condition.format(row=row)
+        if delta > 0:
+            statements.append(f"""
+                INSERT INTO request_counters (scope, scope_id, status, count)
+                SELECT '{scope}', {scope_id}, {row}.status, 1 WHERE {condition}
+                ON CONFLICT (scope, scope_id, status) DO UPDATE SET count = count + 1;""")
+        else:
+            statements.append(f"""
+                UPDATE request_counters SET count = count - 1
+                WHERE scope = '{scope}' AND scope_id = {scope_id} AND status = {row}.status AND {condition};""")
+    return "".join(statements)
+
+def rebuild_request_counters(cursor):
+    """Recount every counter from the requests table (and the archive, once it exists)"""
+    cursor.execute("DELETE FROM request_counters;")
+    if table_exists(cursor, "requests_archive"):
+        cursor.execute("""
+            INSERT INTO request_counters (scope, scope_id, status, count)
+            SELECT 'archived', '', status, COUNT(*) FROM requests_archive GROUP BY status;
+        """)
+    for scope, scope_id, condition in COUNTER_SCOPES:
+        scope_id = scope_id.format(row="requests")
+        condition = condition.format(row="requests")
+        cursor.execute(f"""
+            INSERT INTO request_counters (scope, scope_id, status, count)
+            SELECT '{scope}', {scope_id}, status, COUNT(*) FROM requests
+            WHERE {condition}
+            GROUP BY {scope_id}, status;
+        """)
+
+def migration_003_request_counters(cursor):
+    # scope_id has no declared type so ids stay integers and departments stay text
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_counters (
+            scope TEXT NOT NULL,
+            scope_id NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, scope_id, status)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_requests_counters_insert AFTER INSERT ON requests
+        BEGIN {counter_trigger_statements('NEW', 1)}
+        END;
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_requests_counters_delete AFTER DELETE ON requests
+        BEGIN {counter_trigger_statements('OLD', -1)}
+        END;
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_requests_counters_update
+        AFTER UPDATE OF status, studentID, department, workerID ON requests
+        BEGIN {counter_trigger_statements('OLD', -1)} {counter_trigger_statements('NEW', 1)}
+        END;
+    """)
+    rebuild_request_counters(cursor)
+
+def status_counts(scope, scope_id=''):
+    """Number of requests per status for one counter scope"""
+    rows = execute_query(
+        "SELECT status, count FROM request_counters WHERE scope = ? AND scope_id = ?;",
+        [scope, scope_id], fetchall=True
+    )
+    return {row['status']: row['count'] for row in rows}
+
+def migration_004_image_derivatives(cursor):
+    for table, _, thumb_column, preview_column in IMAGE_DERIVATIVE_COLUMNS:
+        add_column_if_missing(cursor, table, thumb_column, "TEXT")
+        add_column_if_missing(cursor, table, preview_column, "TEXT")
+    # Partial indexes let the derivative job find unprocessed uploads without a scan
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_image_pending ON requests (id) WHERE image_path IS NOT NULL AND image_thumb IS NULL;")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_worker_image_pending ON requests (id) WHERE worker_image_path IS NOT NULL AND worker_image_thumb IS NULL;")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lost_items_image_pending ON lost_items (id) WHERE image_path IS NOT NULL AND image_thumb IS NULL;")
+
+def migration_005_upload_refcounts(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS uploads (
+            path TEXT PRIMARY KEY,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            size INTEGER,
+            orphaned_at REAL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_orphaned ON uploads (orphaned_at) WHERE refcount <= 0;")
+    for table, column in UPLOAD_REFERENCE_COLUMNS:
+        for statement in upload_reference_triggers(table, column):
+            cursor.execute(statement)
+    
+    # Files already in the flat upload folder: referenced ones get counted below,
+    # the rest become orphans for the collector
+    upload_folder = app.config['UPLOAD_FOLDER']
+    legacy_files = [entry for entry in os.scandir(upload_folder) if entry.is_file()] if os.path.isdir(upload_folder) else []
+    cursor.executemany(
+        "INSERT OR IGNORE INTO uploads (path, refcount, size) VALUES (?, 0, ?);",
+        [(entry.name, entry.stat().st_size) for entry in legacy_files]
+    )
+    rebuild_upload_refcounts(cursor)
+
+def fts_trigger_statements(table, columns):
+    """Triggers keeping the external-content FTS5 index <table>_fts in step with <table>"""
+    fts = f"{table}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{column}" for column in columns)
+    old_values = ", ".join(f"OLD.{column}" for column in columns)
+    insert = f"INSERT INTO {fts} (rowid, {column_list}) VALUES (NEW.id, {new_values});"
+    delete = f"INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN {insert} END;",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN {delete} END;",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {column_list} ON {table} BEGIN {delete} {insert} END;",
+    ]
+
+def migration_006_full_text_search(cursor):
+    for table, columns in FTS_COLUMNS.items():
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                {', '.join(columns)}, content='{table}', content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2'
+            );
+        """)
+        for statement in fts_trigger_statements(table, columns):
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');")
+
+def version_bump(scope, condition="1"):
+    """Trigger statement adding one to the change version of a scope expression"""
+    return f"""
+        INSERT INTO change_versions (scope, version) SELECT {scope}, 1 WHERE {scope} IS NOT NULL AND {condition}
+        ON CONFLICT(scope) DO UPDATE SET version = version + 1;"""
+
+def migration_007_change_versions(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    request_bumps = {
+        'NEW': version_bump("'global'") + version_bump("'student:' || NEW.studentID") + version_bump("'worker:' || NEW.workerID"),
+        'OLD': version_bump("'global'") + version_bump("'student:' || OLD.studentID") + version_bump("'worker:' || OLD.workerID"),
+    }
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_requests_versions_insert AFTER INSERT ON requests BEGIN {request_bumps['NEW']} END;")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_requests_versions_delete AFTER DELETE ON requests BEGIN {request_bumps['OLD']} END;")
+    # A reassignment changes both the old and the new worker's page
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_requests_versions_update AFTER UPDATE ON requests
+        BEGIN {request_bumps['NEW']} {version_bump("'worker:' || OLD.workerID", "OLD.workerID IS NOT NEW.workerID")} END;
+    """)
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_lost_items_versions_{event.lower()} AFTER {event} ON lost_items
+            BEGIN {version_bump("'lost_found'")} END;
+        """)
+
+def migration_008_live_events(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS live_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            audience TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_live_events_created ON live_events (created_at);")
+
+# Request archive tables (see archive_completed_requests)
+ARCHIVE_TABLES = [('requests', 'requests_archive'), ('email_notifications', 'email_notifications_archive')]
+ARCHIVE_COUNTER_INCREMENT = """
+    INSERT INTO request_counters (scope, scope_id, status, count) VALUES ('archived', '', NEW.status, 1)
+    ON CONFLICT (scope, scope_id, status) DO UPDATE SET count = count + 1;"""
+ARCHIVE_COUNTER_DECREMENT = """
+    UPDATE request_counters SET count = count - 1 WHERE scope = 'archived' AND scope_id = '' AND status = OLD.status;"""
+ARCHIVE_CANDIDATES_QUERY = """
+    SELECT id FROM requests
+    WHERE status = 'Completed' AND date < ?
+    AND NOT EXISTS (
+        SELECT 1 FROM email_outbox
+        WHERE status IN ('Queued', 'Sending')
+        AND notification_id IN (SELECT id FROM email_notifications WHERE request_id = requests.id)
+    )
+    ORDER BY date, id LIMIT ?;
+"""
+
+def migration_009_request_archive(cursor):
+    # Archive tables mirror their live table column for column, plus archived_at.
+    # Columns added to requests or email_notifications later must be added here too.
+    for table, archive in ARCHIVE_TABLES:
+        cursor.execute(f"PRAGMA table_info({table});")
+        columns = [f"{name} {col_type} PRIMARY KEY" if pk else f"{name} {col_type}"
+                   for _, name, col_type, _, _, pk in cursor.fetchall()]
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive} ({', '.join(columns)}, archived_at TEXT NOT NULL);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_archive_date_id ON requests_archive (date, id);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_notifications_archive_request ON email_notifications_archive (request_id);")
+    # Candidates for archiving, oldest first; also covers the status-only lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_status_date ON requests (status, date, id);")
+    cursor.execute("DROP INDEX IF EXISTS idx_requests_status;")
+    
+    # Archived photos stay referenced, so the upload collector keeps them
+    for table, column in ARCHIVE_UPLOAD_REFERENCE_COLUMNS:
+        for statement in upload_reference_triggers(table, column):
+            cursor.execute(statement)
+    # Archived requests are counted under the 'archived' scope; the live scopes drop them
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_requests_archive_counters_insert AFTER INSERT ON requests_archive
+        BEGIN {ARCHIVE_COUNTER_INCREMENT} END;""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_requests_archive_counters_delete AFTER DELETE ON requests_archive
+        BEGIN {ARCHIVE_COUNTER_DECREMENT} END;""")
+
+def migration_010_email_bodies(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_bodies (
+            hash TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            compressed INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_bodies_created ON email_bodies (created_at);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_notifications_archive_sent_date ON email_notifications_archive (sent_date, id);")
+    
+    # Move existing bodies into email_bodies; message keeps '' (it is NOT NULL)
+    for table in EMAIL_BODY_TABLES:
+        add_column_if_missing(cursor, table, "body_hash", "TEXT")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_body_hash ON {table} (body_hash);")
+        rows = cursor.execute(f"SELECT id, message FROM {table} WHERE body_hash IS NULL;").fetchall()
+        hashes = {}
+        for _, message in rows:
+            if message not in hashes:
+                hashes[message] = store_email_body(message, cursor)
+        cursor.executemany(
+            f"UPDATE {table} SET body_hash = ?, message = '' WHERE id = ?;",
+            [(hashes[message], row_id) for row_id, message in rows]
+        )
+
+def migration_011_job_leases(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_leases (
+            job TEXT PRIMARY KEY,
+            owner TEXT,
+            expires_at REAL,
+            last_started_at REAL,
+            last_finished_at REAL,
+            last_duration REAL,
+            last_outcome TEXT,
+            runs INTEGER NOT NULL DEFAULT 0,
+            overlaps INTEGER NOT NULL DEFAULT 0,
+            high_water INTEGER NOT NULL DEFAULT 0
+        );
+    ''')
+
+def migration_012_request_events(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL,
+            event TEXT NOT NULL,
+            status TEXT,
+            worker_id INTEGER,
+            department TEXT,
+            actor_id INTEGER,
+            at REAL NOT NULL,
+            day TEXT NOT NULL,
+            metric TEXT,
+            seconds REAL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_request_events_request ON request_events (request_id, event);")
+    # Samples are re-read per day and group when their rollup is refreshed
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_request_events_sla ON request_events (metric, day, seconds) WHERE metric IS NOT NULL;")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_request_events_sla_department ON request_events (metric, day, department, seconds) WHERE metric IS NOT NULL;")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_request_events_sla_worker ON request_events (metric, day, worker_id, seconds) WHERE metric IS NOT NULL;")
+    for event in ('UPDATE', 'DELETE'):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_request_events_no_{event.lower()} BEFORE {event} ON request_events
+            BEGIN SELECT RAISE(ABORT, 'request_events is append-only'); END;
+        """)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sla_rollups (
+            metric TEXT NOT NULL,
+            scope TEXT NOT NULL,
+            day TEXT NOT NULL,
+            scope_id TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            p50_seconds REAL NOT NULL,
+            p90_seconds REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (metric, scope, day, scope_id)
+        ) WITHOUT ROWID
+    ''')
+
+def migration_013_archive_search(cursor):
+    # Archived requests stay searchable: requests_archive gets its own index
+    table, columns = 'requests_archive', FTS_COLUMNS['requests']
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+            {', '.join(columns)}, content='{table}', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        );
+    """)
+    for statement in fts_trigger_statements(table, columns):
+        cursor.execute(statement)
+    cursor.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');")
+
+def migration_014_untrack_legacy_uploads(cursor):
+    # Migration 5 registers unreferenced flat-folder files as orphans; stop
+    # tracking them so the collector leaves them alone (referenced ones keep
+    # their counts and sizes). Content-addressed uploads always live in a subfolder.
+    cursor.execute("DELETE FROM uploads WHERE refcount <= 0 AND instr(path, '/') = 0;")
+
+def migration_015_pending_versions(cursor):
+    # Each time a request becomes Pending (created, reopened, or reassigned while
+    # pending) it takes the next 'pending' change version, so the reminder job
+    # can resume after the highest version it reported. Existing rows start
+    # from their ids, which the job's high-water mark used to track.
+    add_column_if_missing(cursor, "requests", "pending_version", "INTEGER")
+    cursor.execute("UPDATE requests SET pending_version = id WHERE status = 'Pending' AND pending_version IS NULL;")
+    cursor.execute("""
+        INSERT INTO change_versions (scope, version)
+        SELECT 'pending', MAX(COALESCE((SELECT MAX(id) FROM requests), 0),
+                              COALESCE((SELECT high_water FROM job_leases WHERE job = 'check_for_pending_requests'), 0))
+        ON CONFLICT(scope) DO NOTHING;
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_requests_pending_version ON requests (pending_version) WHERE status = 'Pending';")
+    stamp = f"""{version_bump("'pending'")}
+        UPDATE requests SET pending_version = (SELECT version FROM change_versions WHERE scope = 'pending') WHERE id = NEW.id;"""
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_requests_pending_insert AFTER INSERT ON requests
+        WHEN NEW.status = 'Pending'
+        BEGIN {stamp} END;
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_requests_pending_update AFTER UPDATE OF status, workerID ON requests
+        WHEN NEW.status = 'Pending' AND (OLD.status IS NOT 'Pending' OR OLD.workerID IS NOT NEW.workerID)
+        BEGIN {stamp} END;
+    """)
+
+# Workers with their open (not Completed) task count
+WORKER_ROSTER_QUERY = """
+    SELECT u.id, u.username, u.email, u.department, u.status, COALESCE(SUM(c.count), 0) as assigned_requests 
+    FROM users u 
+    LEFT JOIN request_counters c ON c.scope = 'worker' AND c.scope_id = u.id AND c.status != 'Completed'
+    WHERE u.role = 'Worker' {department_filter}
+    GROUP BY u.id;
+"""
+
+QUERY_INDEX_CHECKS = [
+    "SELECT * FROM requests WHERE studentID = 1 ORDER BY date DESC;",
+    """SELECT requests.*, users.username as student_name FROM requests
+       LEFT JOIN users ON requests.studentID = users.id
+       WHERE requests.workerID = 1 ORDER BY requests.date DESC;""",
+    "SELECT COUNT(*) FROM requests WHERE status = 'Pending';",
+    "SELECT * FROM users WHERE email = 'a@b.c' AND role = 'Student';",
+    """SELECT u.*, COUNT(r.id) as assigned_requests FROM users u
+       LEFT JOIN requests r ON u.id = r.workerID AND r.status != 'Completed'
+       WHERE u.role = 'Worker' AND u.department = 'Plumbing' GROUP BY u.id;""",
+    """SELECT requests.*, users.username as student_name FROM requests
+       LEFT JOIN users ON requests.studentID = users.id
+       ORDER BY requests.date DESC, requests.id DESC LIMIT 50;""",
+    """SELECT lost_items.*, reporter.username as reported_by FROM lost_items
+       LEFT JOIN users as reporter ON lost_items.studentID = reporter.id
+       ORDER BY lost_items.date_found DESC;""",
+    """SELECT en.*, u.username as recipient_name FROM email_notifications en
+       LEFT JOIN users u ON en.recipient_id = u.id
+       ORDER BY en.sent_date DESC, en.id DESC;""",
+    "SELECT id FROM email_notifications WHERE broadcast_id = 1 AND status = 'Queued' AND id > 0 ORDER BY id LIMIT 200;",
+]
+
+# (version, description, function, query plan checks)
+MIGRATIONS = [
+    (1, "Baseline schema", migration_001_baseline, []),
+    (2, "Composite indexes for hot queries", migration_002_query_indexes, QUERY_INDEX_CHECKS),
+    (3, "Trigger-maintained request counters", migration_003_request_counters, [
+        "SELECT status, count FROM request_counters WHERE scope = 'student' AND scope_id = 1;",
+        WORKER_ROSTER_QUERY.format(department_filter="AND u.department = 'Plumbing'"),
+    ]),
+    (4, "Thumbnail and preview columns for uploads", migration_004_image_derivatives, [
+        "SELECT id, image_path FROM requests WHERE image_path IS NOT NULL AND image_thumb IS NULL LIMIT 50;",
+        "SELECT id, worker_image_path FROM requests WHERE worker_image_path IS NOT NULL AND worker_image_thumb IS NULL LIMIT 50;",
+        "SELECT id, image_path FROM lost_items WHERE image_path IS NOT NULL AND image_thumb IS NULL LIMIT 50;",
+    ]),
+    (5, "Reference-counted upload storage", migration_005_upload_refcounts, [
+        "SELECT path, size FROM uploads WHERE refcount <= 0 AND orphaned_at < 0 AND path > '' ORDER BY path LIMIT 100;",
+    ]),
+    (6, "Full-text search indexes", migration_006_full_text_search, []),
+    (7, "Change versions for conditional GET", migration_007_change_versions, [
+        "SELECT scope, version FROM change_versions WHERE scope IN ('global', 'student:1');",
+    ]),
+    (8, "Live event log for Server-Sent Events", migration_008_live_events, [
+        "SELECT id, type, payload FROM live_events WHERE id > 0 AND audience IN ('student:1', 'students') ORDER BY id LIMIT 200;",
+        "SELECT id FROM live_events WHERE created_at < 0;",
+    ]),
+    (9, "Archive tables for completed requests", migration_009_request_archive, [
+        ARCHIVE_CANDIDATES_QUERY.replace("?", "''", 1).replace("?", "500"),
+        "SELECT * FROM requests_archive ORDER BY date DESC, id DESC LIMIT 50;",
+        "SELECT * FROM email_notifications_archive WHERE request_id = 1;",
+    ]),
+    (10, "Deduplicated email bodies", migration_010_email_bodies, [
+        "SELECT id FROM email_notifications WHERE sent_date < '' AND status != 'Queued' ORDER BY sent_date, id LIMIT 1000;",
+        "SELECT id FROM email_notifications_archive WHERE sent_date < '' AND status != 'Queued' ORDER BY sent_date, id LIMIT 1000;",
+        "SELECT body, compressed FROM email_bodies WHERE hash = '';",
+        "SELECT hash FROM email_bodies WHERE created_at < 0 AND NOT EXISTS (SELECT 1 FROM email_outbox WHERE body_hash = email_bodies.hash);",
+    ]),
+    (11, "Leases for single-flight scheduler jobs", migration_011_job_leases, [
+        "SELECT owner, expires_at, last_started_at FROM job_leases WHERE job = 'check_for_pending_requests';",
+        "SELECT COUNT(*), MAX(id) FROM requests WHERE status = 'Pending' AND id > 0;",
+    ]),
+    (12, "Request events and SLA rollups", migration_012_request_events, [
+        "SELECT MIN(CASE WHEN event = 'created' THEN at END) as created_at, MAX(metric = 'assign') as seen FROM request_events WHERE request_id = 1;",
+        "SELECT id, day, metric, department, worker_id FROM request_events WHERE id > 0 ORDER BY id LIMIT 1000;",
+        "SELECT seconds FROM request_events WHERE metric = 'assign' AND day = '' ORDER BY seconds;",
+        "SELECT seconds FROM request_events WHERE metric = 'assign' AND day = '' AND department = 'Plumbing' ORDER BY seconds;",
+        "SELECT seconds FROM request_events WHERE metric = 'assign' AND day = '' AND worker_id = 1 ORDER BY seconds;",
+        "SELECT * FROM sla_rollups WHERE metric IN ('assign', 'complete') AND scope IN ('all', 'department', 'worker') AND day >= '';",
+    ]),
+    (13, "Full-text search over archived requests", migration_013_archive_search, []),
+    (14, "Leave unreferenced legacy uploads untracked", migration_014_untrack_legacy_uploads, []),
+    (15, "Change versions for pending requests", migration_015_pending_versions, [
+        "SELECT COUNT(*), MAX(pending_version) FROM requests WHERE status = 'Pending' AND pending_version > 0;",
+    ]),
+]
+
+def schema_snapshot(conn):
+    """Copy the schema, without data or statistics, into an in-memory database"""
+    snapshot = sqlite3.connect(':memory:')
+    for (sql,) in conn.execute("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid;"):
+        try:
+            snapshot.execute(sql)
+        except sqlite3.OperationalError as e:
+            if 'already exists' not in str(e):  # e.g. shadow tables of virtual tables
+                raise
+    return snapshot
+
+def explain_query_plan(conn, query, params=()):
+    """EXPLAIN QUERY PLAN details, read through a plain cursor so the EXPLAIN itself is not timed"""
+    return [step[3] for step in sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+def plan_problems(plan):
+    """Return the plan steps that scan a whole table or sort in a temp b-tree"""
+    problems = []
+    for detail in plan:
+        full_scan = detail.startswith("SCAN") and "USING" not in detail
+        if full_scan or "TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+def query_plan_problems(conn, query):
+    return plan_problems(explain_query_plan(conn, query))
+
+def verify_query_plans(conn, queries):
+    """Raise RuntimeError if any query would scan a table or sort without an index"""
+    if not queries:
+        return
+    snapshot = schema_snapshot(conn)
+    for query in queries:
+        problems = query_plan_problems(snapshot, query)
+        if problems:
+            snapshot.close()
+            raise RuntimeError(f"Query plan check failed for {' '.join(query.split())}: {problems}")
+    snapshot.close()
+
+def applied_migrations(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    return {row[0] for row in conn.execute("SELECT version FROM schema_version;")}
+
+# Database migration for new and existing databases
+def migrate_db(target=None):
+    """Apply pending migrations up to target (default: latest); returns the versions applied"""
+    conn = open_db_connection()
+    applied = applied_migrations(conn)
+    newly_applied = []
+    
+    for version, description, migrate, checks in MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN;")
+            migrate(cursor)
+            verify_query_plans(conn, checks)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?);",
+                [version, description, datetime.now().isoformat(timespec='seconds')]
             )
-        ''')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            conn.close()
+            raise
+        print(f"Applied migration {version}: {description}")
+        newly_applied.append(version)
     
+    conn.close()
+    return newly_applied
+
+@app.cli.group()
+def db():
+    """Apply or inspect database migrations."""
+
+@db.command("upgrade")
+@click.option("--to", "target", type=int, default=None, help="Stop at this schema version.")
+def db_upgrade(target):
+    """Apply pending migrations."""
+    applied = migrate_db(target)
+    if not applied:
+        click.echo("Database is up to date.")
+
+@db.command("status")
+def db_status():
+    """List migrations and whether they have been applied."""
+    conn = open_db_connection()
+    applied = {row['version']: row['applied_at'] for row in
+               conn.execute("SELECT version, applied_at FROM schema_version;")} if \
+        conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='schema_version';").fetchone() else {}
+    conn.close()
+    for version, description, _, _ in MIGRATIONS:
+        state = f"applied {applied[version]}" if version in applied else "pending"
+        click.echo(f"{version:>4}  {description:<45} {state}")
+
+@db.command("jobs")
+def db_jobs():
+    """Show scheduler job leases and their last runs."""
+    conn = open_db_connection()
+    rows = conn.execute("SELECT * FROM job_leases ORDER BY job;").fetchall() if \
+        conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='job_leases';").fetchone() else []
+    conn.close()
+    for row in rows:
+        last_run = datetime.fromtimestamp(row['last_started_at']).isoformat(timespec='seconds') if row['last_started_at'] else "never"
+        duration = f"{row['last_duration']:.2f}s" if row['last_duration'] is not None else "-"
+        holder = f"held by {row['owner']}" if row['owner'] else "free"
+        click.echo(f"{row['job']:<30} last {last_run} {row['last_outcome'] or '-':<8} {duration:>9}  "
+                   f"runs {row['runs']}  overlaps {row['overlaps']}  {holder}")
+
+@db.command("rebuild-counters")
+def db_rebuild_counters():
+    """Recount request_counters from scratch, e.g. after manual edits."""
+    conn = open_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN;")
+    rebuild_request_counters(cursor)
     conn.commit()
     conn.close()
+    click.echo("Request counters rebuilt.")
+
+@db.command("migrate-uploads")
+def db_migrate_uploads():
+    """Move legacy flat uploads into content-addressed storage."""
+    with app.app_context():
+        legacy = execute_query("SELECT path FROM uploads WHERE refcount > 0 AND path NOT LIKE '%/%';", fetchall=True)
+        moved = 0
+        for row in legacy:
+            legacy_file = os.path.join(app.config['UPLOAD_FOLDER'], row['path'])
+            if not os.path.isfile(legacy_file):
+                continue
+            with open(legacy_file, 'rb') as f:
+                path = store_upload_stream(f, row['path'].rsplit('.', 1)[-1].lower())
+            # Triggers move the references; the old file is left for the collector
+            with db_transaction():
+                for table, column, thumb_column, preview_column in IMAGE_DERIVATIVE_COLUMNS + ARCHIVE_DERIVATIVE_COLUMNS:
+                    execute_query(
+                        f"UPDATE {table} SET {column} = ?, {thumb_column} = NULL, {preview_column} = NULL WHERE {column} = ?;",
+                        [path, row['path']]
+                    )
+            moved += 1
+    click.echo(f"Moved {moved} uploads into content-addressed storage.")
+
+@db.command("verify")
+def db_verify():
+    """Check the query plans of every applied migration."""
+    conn = open_db_connection()
+    applied = applied_migrations(conn)
+    snapshot = schema_snapshot(conn)
+    failures = 0
+    for version, description, _, checks in MIGRATIONS:
+        if version not in applied:
+            continue
+        for query in checks:
+            problems = query_plan_problems(snapshot, query)
+            if problems:
+                failures += 1
+                click.echo(f"FAIL  migration {version}: {' '.join(query.split())}\n      {problems}")
+    snapshot.close()
+    conn.close()
+    if failures:
+        raise SystemExit(1)
+    click.echo("All query plan checks passed.")
 
 # Helper function to execute queries
 def execute_query(query, params=(), fetch=False, fetchall=False):
@@ -226,8 +1478,9 @@ def execute_query(query, params=(), fetch=False, fetchall=False):
     else:
         result = None
     
-    conn.commit()
-    conn.close()
+    cursor.close()
+    if conn.in_transaction and conn.transaction_depth == 0:
+        conn.commit()
     
     return result
 
@@ -242,6 +1495,162 @@ def rows_to_dict(rows):
         return None
     return [dict(row) for row in rows]
 
+# Opaque pagination cursors for keyset pagination
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(token):
+    """Decode a cursor, returning None if it is missing or malformed"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+def parse_limit(value, default, maximum=200):
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+# Keyset pagination, newest first on an indexed (date, id) pair
+def fetch_keyset_page(select, conditions, params, date_column, id_column, cursor=None, limit=50):
+    """
+    Run select (a query with a {where} placeholder) ordered by date_column,
+    id_column descending and return (rows, next_cursor) for one page.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    position = decode_cursor(cursor)
+    if position and len(position) == 2:
+        conditions.append(f"({date_column} < ? OR ({date_column} = ? AND {id_column} < ?))")
+        params.extend([position[0], position[0], position[1]])
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = execute_query(
+        f"{select.format(where=where)} ORDER BY {date_column} DESC, {id_column} DESC LIMIT ?;",
+        params + [limit + 1], fetchall=True
+    )
+    
+    rows = rows_to_dict(rows)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        date_key, id_key = date_column.split('.')[-1], id_column.split('.')[-1]
+        next_cursor = encode_cursor([rows[-1][date_key], rows[-1][id_key]])
+    return rows, next_cursor
+
+# Admin request listing, newest first, filtered in SQL and paged on (date, id)
+def fetch_admin_requests(status=None, priority=None, department=None, search=None, cursor=None, limit=50):
+    """Return (rows, next_cursor) for one page of the admin request table"""
+    conditions = []
+    params = []
+    
+    if status:
+        conditions.append("requests.status = ?")
+        params.append(status)
+    if priority:
+        conditions.append("requests.priority = ?")
+        params.append(priority)
+    if department:
+        conditions.append("requests.department = ?")
+        params.append(department)
+    match = fts_query(search)
+    if match:
+        conditions.append("""(requests.id IN (SELECT rowid FROM requests_fts WHERE requests_fts MATCH ?)
+            OR requests.studentID IN (SELECT id FROM users WHERE role = 'Student' AND username LIKE ?))""")
+        params.extend([match, f"%{search}%"])
+    
+    return fetch_keyset_page("""
+        SELECT requests.*, users.username as student_name, workers.username as worker_name
+        FROM requests 
+        LEFT JOIN users ON requests.studentID = users.id 
+        LEFT JOIN users as workers ON requests.workerID = workers.id
+        {where}
+    """, conditions, params, "requests.date", "requests.id", cursor, limit)
+
+# Full-text search
+# requests_fts and lost_items_fts are FTS5 indexes over the text columns of
+# their tables (external content, so the text is not stored twice) and are
+# kept current by triggers; requests_archive_fts does the same for archived
+# requests, which are searched together with the live ones. Results are ranked
+# with bm25, title-like columns weighted highest, and paged on (score, id).
+FTS_COLUMNS = {
+    'requests': ['title', 'description', 'location', 'notes', 'worker_notes'],
+    'lost_items': ['item_name', 'description', 'location_found'],
+}
+FTS_WEIGHTS = {
+    'requests': '10.0, 4.0, 3.0, 1.0, 1.0',
+    'lost_items': '10.0, 4.0, 3.0',
+}
+SEARCH_SOURCES = {
+    'requests': ['requests', 'requests_archive'],
+    'lost_items': ['lost_items'],
+}
+SEARCH_PAGE_SIZE = 20
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix"""
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def highlight_snippet(snippet):
+    """HTML-escape an FTS5 snippet and turn its match markers into <mark> tags"""
+    escaped = str(escape(snippet or ''))
+    return Markup(escaped.replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>'))
+
+def search_index(table, text, role, user_id, cursor=None, limit=SEARCH_PAGE_SIZE):
+    """Return (results, next_cursor) for one page of ranked matches the user may see"""
+    match = fts_query(text)
+    if not match:
+        return [], None
+    
+    if table == 'requests':
+        columns = "t.id, t.title, t.status, t.priority, t.date, t.location"
+        scope = {'Admin': "", 'Student': "AND t.studentID = ?", 'Worker': "AND t.workerID = ?"}.get(role)
+    else:
+        columns = "t.id, t.item_name, t.status, t.date_found, t.location_found"
+        scope = {'Admin': "", 'Student': ""}.get(role)
+    if scope is None:
+        return [], None
+    sources = [f"""
+            SELECT {columns}, {int(source != table)} as archived,
+                   bm25({source}_fts, {FTS_WEIGHTS[table]}) as score,
+                   snippet({source}_fts, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16) as snippet
+            FROM {source}_fts
+            JOIN {source} t ON t.id = {source}_fts.rowid
+            WHERE {source}_fts MATCH ? {scope}
+    """ for source in SEARCH_SOURCES[table]]
+    params = ([match] + ([user_id] if scope else [])) * len(sources)
+    
+    position = decode_cursor(cursor)
+    after = ""
+    if position and len(position) == 2:
+        after = "WHERE score > ? OR (score = ? AND id > ?)"
+        params.extend([position[0], position[0], position[1]])
+    
+    rows = execute_query(f"""
+        SELECT * FROM ({' UNION ALL '.join(sources)}) {after}
+        ORDER BY score, id
+        LIMIT ?;
+    """, params + [limit + 1], fetchall=True)
+    
+    results = rows_to_dict(rows)
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = encode_cursor([results[-1]['score'], results[-1]['id']])
+    for result in results:
+        result['snippet'] = highlight_snippet(result['snippet'])
+    return results, next_cursor
+
 # Check database schema
 def check_db_schema():
     conn = get_db_connection()
@@ -261,51 +1670,186 @@ def check_db_schema():
     for col in requests_columns:
         print(f"  {col['name']} - {col['type']}")
     
-    conn.close()
+    cursor.close()
 
 # Simple password check for legacy passwords
 def check_legacy_password(hashed_password, plain_password):
     """Check if plain password matches legacy hashed password"""
     return hashed_password == plain_password
 
+# Password hashing
+# PBKDF2/scrypt is deliberately slow, so it runs in a small process pool instead
+# of on the request thread. At most queue_limit hashes may be queued or running;
+# beyond that callers get PasswordHasherBusy straight away and the user is asked
+# to try again, which keeps a login rush from starving every other route.
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full or too slow"""
+
+class PasswordHasher:
+    """Bounded process pool for password hashing, with latency and queue metrics"""
+
+    def __init__(self, method, workers, queue_limit, timeout):
+        self.method = method
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)  # seconds, most recent hashes
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            # The app is multithreaded by now, so workers must not be forked from it:
+            # they start from a fresh forkserver (or spawn) process instead
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            if context.get_start_method() == 'forkserver':
+                context.set_forkserver_preload(['werkzeug.security'])
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.queue_limit:
+                self.rejected += 1
+                metrics.inc('campuscare_password_hash_rejected_total')
+                raise PasswordHasherBusy()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            metrics.set('campuscare_password_hash_in_flight', self.in_flight)
+            executor = self._get_executor()
+        started = time.perf_counter()
+        future = executor.submit(fn, *args)
+        try:
+            result = future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()  # free its place in the queue if no worker has picked it up yet
+            with self._lock:
+                self.rejected += 1
+            metrics.inc('campuscare_password_hash_rejected_total')
+            raise PasswordHasherBusy()
+        else:
+            # A timed out hash was already counted as rejected
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.completed += 1
+                self._latencies.append(elapsed)
+            metrics.observe('campuscare_password_hash_duration_seconds', elapsed)
+            return result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                metrics.set('campuscare_password_hash_in_flight', self.in_flight)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, hashed_password, password):
+        return self._run(check_password_hash, hashed_password, password)
+
+    def method_tag(self):
+        """Hash prefix (e.g. 'scrypt:32768:8:1') produced by the configured method, filling in werkzeug's defaults"""
+        name, *args = self.method.split(':')
+        if name == 'scrypt':
+            return ':'.join([name, *(args or ['32768', '8', '1'])])
+        if name == 'pbkdf2':
+            hash_name = args[0] if args else 'sha256'
+            iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+            return f"{name}:{hash_name}:{iterations}"
+        return self.method
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'method': self.method,
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+        for name, fraction in (('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+            stats[name] = round(latencies[int(fraction * (len(latencies) - 1))] * 1000, 1) if latencies else None
+        return stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(
+    app.config['PASSWORD_HASH_METHOD'],
+    app.config['PASSWORD_HASH_WORKERS'],
+    app.config['PASSWORD_HASH_QUEUE_LIMIT'],
+    app.config['PASSWORD_HASH_TIMEOUT_SECONDS']
+)
+atexit.register(password_hasher.shutdown)
+
+def hash_password(password):
+    return password_hasher.hash(password)
+
+def verify_password(user, password):
+    """
+    Check a login password against the stored hash. Legacy plain-text passwords
+    and hashes made with another method are re-hashed on a successful login.
+    """
+    stored = user["password"]
+    try:
+        matched = password_hasher.check(stored, password)
+    except ValueError:
+        # Handle legacy password format
+        matched = check_legacy_password(stored, password)
+        stale = True
+    else:
+        stale = stored.split('$', 1)[0] != password_hasher.method_tag()
+    
+    if matched and stale:
+        execute_query("UPDATE users SET password = ? WHERE id = ?;", [hash_password(password), user["id"]])
+    return matched
+
+def password_login(role, email, password, home):
+    """Log a user of the given role in, or flash why not"""
+    user = execute_query("SELECT * FROM users WHERE email = ? AND role = ?;", [email, role], fetch=True)
+    if not user:
+        flash(f"{role} Account Not Found!", "danger")
+        return render_template("index.html")
+    if not verify_password(user, password):
+        flash("Incorrect Password!", "danger")
+        return render_template("index.html")
+    
+    session["username"] = user["username"]
+    session["user_id"] = user["id"]
+    session["role"] = user["role"]
+    return redirect(home)
+
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    flash("The server is busy right now. Please try again in a few seconds.", "warning")
+    headers = {'Retry-After': '5'}
+    if request.endpoint == 'login':
+        return render_template("index.html"), 503, headers
+    return redirect(request.referrer or "/"), 303, headers
+
+def mail_configured():
+    """Check if email credentials are configured"""
+    return not (app.config['MAIL_USERNAME'] == 'your_email@gmail.com' or app.config['MAIL_PASSWORD'] == 'your_app_password_here')
+
 # Email function
-def send_email(to_email, subject, message, attachment_path=None):
+def send_email(to_email, subject, message, attachment_path=None, message_id=None):
     """Send email notification with optional attachment"""
     try:
         # Check if email credentials are configured
-        if app.config['MAIL_USERNAME'] == 'your_email@gmail.com' or app.config['MAIL_PASSWORD'] == 'your_app_password_here':
+        if not mail_configured():
             print("⚠️ Email credentials not configured. Using default values.")
             print("ℹ️ Please set MAIL_USERNAME and MAIL_PASSWORD environment variables")
             return False
             
-        print(f"📧 Attempting to send email to: {to_email}")
-        print(f"📋 Subject: {subject}")
-        
-        msg = MIMEMultipart()
-        msg['From'] = app.config['MAIL_USERNAME']
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(message, 'html'))
-        
-        # Add attachment if provided
-        if attachment_path and os.path.exists(attachment_path):
-            with open(attachment_path, 'rb') as f:
-                attachment = MIMEApplication(f.read(), _subtype='octet-stream')
-                attachment.add_header('Content-Disposition', 'attachment', 
-                                     filename=os.path.basename(attachment_path))
-                msg.attach(attachment)
-            print(f"📎 Attachment added: {attachment_path}")
-        
-        server = smtplib.SMTP(app.config['MAIL_SERVER'], app.config['MAIL_PORT'])
-        server.ehlo()  # Identify yourself to the server
-        server.starttls()  # Secure the connection
-        server.ehlo()  # Re-identify yourself after TLS
-        server.login(app.config['MAIL_USERNAME'], app.config['MAIL_PASSWORD'])
-        server.send_message(msg)
-        server.quit()
-        
-        print(f" Email sent successfully to {to_email}")
+        deliver_email(to_email, subject, message, attachment_path, message_id)
         return True
     except Exception as e:
         print(f" Error sending email: {e}")
@@ -313,23 +1857,609 @@ def send_email(to_email, subject, message, attachment_path=None):
         traceback.print_exc()
         return False
 
-def send_status_update_email(request_id, status, worker_notes=None, worker_image_path=None):
-    """Send status update email for a specific request to student and worker"""
-    # Get request details with student and worker information
-    request_data = execute_query("""
-        SELECT requests.*, 
-               students.username as student_name, students.email as student_email,
-               workers.username as worker_name, workers.email as worker_email
-        FROM requests 
-        LEFT JOIN users as students ON requests.studentID = students.id 
-        LEFT JOIN users as workers ON requests.workerID = workers.id 
-        WHERE requests.id = ?;
-    """, [request_id], fetch=True)
+def build_email_message(to_email, subject, message, attachment_path=None, message_id=None):
+    """Build the MIME message for an email with optional attachment"""
+    msg = MIMEMultipart()
+    msg['From'] = app.config['MAIL_USERNAME']
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    if message_id:
+        msg['Message-ID'] = message_id
     
-    if not request_data:
-        print(f"Request {request_id} not found")
-        return False
+    msg.attach(MIMEText(message, 'html'))
+    
+    # Add attachment if provided
+    if attachment_path and os.path.exists(attachment_path):
+        with open(attachment_path, 'rb') as f:
+            attachment = MIMEApplication(f.read(), _subtype='octet-stream')
+            attachment.add_header('Content-Disposition', 'attachment', 
+                                 filename=os.path.basename(attachment_path))
+            msg.attach(attachment)
+        print(f"📎 Attachment added: {attachment_path}")
+    
+    return msg
+
+def open_smtp_connection():
+    """Connect and log in to the configured SMTP server"""
+    started = time.perf_counter()
+    try:
+        server = smtplib.SMTP(app.config['MAIL_SERVER'], app.config['MAIL_PORT'], timeout=app.config['MAIL_TIMEOUT'])
+        server.ehlo()  # Identify yourself to the server
+        if app.config['MAIL_USE_TLS']:
+            server.starttls()  # Secure the connection
+            server.ehlo()  # Re-identify yourself after TLS
+        if server.has_extn('auth'):  # local stand-in servers may not offer AUTH
+            server.login(app.config['MAIL_USERNAME'], app.config['MAIL_PASSWORD'])
+    except Exception:
+        metrics.inc('campuscare_smtp_failures_total', {'stage': 'connect'})
+        raise
+    metrics.observe('campuscare_smtp_connect_duration_seconds', time.perf_counter() - started)
+    return server
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of logged-in SMTP connections.
+
+    Connections are reused until they have sent max_messages messages. A
+    connection that sat idle longer than keepalive seconds is checked with NOOP
+    before reuse, and one idle longer than max_idle seconds is dropped. The lock
+    only guards the bookkeeping: NOOP and QUIT run on a connection already taken
+    out of the pool, so a slow server never blocks other threads.
+    """
+
+    def __init__(self, connect, max_size, max_messages, keepalive, max_idle):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+        self._idle = []  # [server, messages_sent, last_used]
+        self._open = 0
+        self._cond = threading.Condition()
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _discard(self, server):
+        """Close a checked-out connection and free its slot"""
+        self._close(server)
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _healthy(self, entry):
+        server, _, last_used = entry
+        idle = time.time() - last_used
+        if idle > self.max_idle:
+            return False
+        if idle > self.keepalive:
+            try:
+                return server.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+
+    def acquire(self):
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.max_size:
+                    self._cond.wait()
+                entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    self._open += 1  # reserve a slot for a new connection
+                    break
+            if self._healthy(entry):
+                return entry
+            self._discard(entry[0])
+        try:
+            return [self.connect(), 0, time.time()]
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, entry, broken=False):
+        if broken or entry[1] >= self.max_messages:
+            self._discard(entry[0])
+            return
+        with self._cond:
+            entry[2] = time.time()
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def send(self, msg):
+        """Send a message, reconnecting once if the server dropped the connection"""
+        for attempt in range(2):
+            entry = self.acquire()
+            started = time.perf_counter()
+            try:
+                entry[0].send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                metrics.inc('campuscare_smtp_failures_total', {'stage': 'send'})
+                self.release(entry, broken=True)
+                if attempt == 1:
+                    raise
+                continue
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                metrics.inc('campuscare_smtp_failures_total', {'stage': 'send'})
+                self.release(entry)  # the connection itself is still fine
+                raise
+            except Exception:
+                metrics.inc('campuscare_smtp_failures_total', {'stage': 'send'})
+                self.release(entry, broken=True)
+                raise
+            metrics.observe('campuscare_smtp_send_duration_seconds', time.perf_counter() - started)
+            entry[1] += 1
+            self.release(entry)
+            return
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for server, _, _ in idle:
+            self._discard(server)
+
+smtp_pool = SMTPConnectionPool(
+    open_smtp_connection,
+    max_size=app.config['MAIL_POOL_SIZE'],
+    max_messages=app.config['MAIL_MAX_MESSAGES_PER_CONNECTION'],
+    keepalive=app.config['MAIL_KEEPALIVE_SECONDS'],
+    max_idle=app.config['MAIL_MAX_IDLE_SECONDS']
+)
+atexit.register(smtp_pool.close_all)
+
+def deliver_email(to_email, subject, message, attachment_path=None, message_id=None):
+    """Send one email over a pooled SMTP connection, raising on failure"""
+    print(f"📧 Attempting to send email to: {to_email}")
+    print(f"📋 Subject: {subject}")
+    
+    msg = build_email_message(to_email, subject, message, attachment_path, message_id)
+    smtp_pool.send(msg)
+    
+    print(f" Email sent successfully to {to_email}")
+
+# Job leases
+# Every gunicorn worker imports the app and starts its own scheduler, so an
+# interval job fires once per process. Jobs decorated with single_flight take
+# the job's row in job_leases first: one process wins and runs the job, the
+# others skip it, and a start within half an interval of the last one counts
+# as the same run. The lease expires after JOB_LEASE_SECONDS so a process
+# that died mid-job cannot hold it forever. The row also records the last
+# run's duration and outcome, how often runs collided, and a high-water mark
+# the job can use to pick up where it left off.
+def acquire_job_lease(job, owner, interval_seconds):
+    """Take the lease on job for owner; returns False if another process has or just had it"""
+    conn = get_db_connection()
+    now = time.time()
+    with db_transaction():
+        # The insert takes SQLite's write lock, so the check below cannot race
+        conn.execute("INSERT OR IGNORE INTO job_leases (job) VALUES (?);", [job])
+        lease = conn.execute("SELECT owner, expires_at, last_started_at FROM job_leases WHERE job = ?;", [job]).fetchone()
+        if lease['owner'] and lease['expires_at'] > now:
+            conn.execute("UPDATE job_leases SET overlaps = overlaps + 1 WHERE job = ?;", [job])
+            reason = 'running'
+        elif lease['last_started_at'] and now - lease['last_started_at'] < interval_seconds / 2:
+            reason = 'recent'
+        else:
+            conn.execute(
+                "UPDATE job_leases SET owner = ?, expires_at = ?, last_started_at = ? WHERE job = ?;",
+                [owner, now + app.config['JOB_LEASE_SECONDS'], now, job]
+            )
+            return True
+    metrics.inc('campuscare_job_skipped_total', {'job': job, 'reason': reason})
+    if reason == 'running':
+        print(f"⏭️ Skipped {job}: still running in {lease['owner']}")
+    return False
+
+def release_job_lease(job, owner, started, outcome, interval_seconds):
+    """Record the finished run and give the lease back"""
+    conn = get_db_connection()
+    now = time.time()
+    duration = now - started
+    with db_transaction():
+        released = conn.execute("""
+            UPDATE job_leases SET owner = NULL, expires_at = NULL, last_finished_at = ?,
+                last_duration = ?, last_outcome = ?, runs = runs + 1
+            WHERE job = ? AND owner = ?;
+        """, [now, duration, outcome, job, owner]).rowcount
+        if not released:
+            # The lease expired mid-run and another process may have started the job
+            conn.execute(
+                "UPDATE job_leases SET overlaps = overlaps + 1, last_duration = ?, last_outcome = ? WHERE job = ?;",
+                [duration, outcome, job]
+            )
+    if not released:
+        metrics.inc('campuscare_job_lease_lost_total', {'job': job})
+        print(f"⚠️ {job} ran {duration:.1f}s and outlived its {app.config['JOB_LEASE_SECONDS']}s lease")
+    elif duration > interval_seconds:
+        print(f"⚠️ {job} ran {duration:.1f}s, longer than its {interval_seconds:.0f}s interval")
+
+def single_flight(**interval):
+    """Run the wrapped job in one process per interval (given like add_job's, e.g. minutes=15)"""
+    interval_seconds = timedelta(**interval).total_seconds()
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            job = func.__name__
+            owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+            if not acquire_job_lease(job, owner, interval_seconds):
+                return None
+            started = time.time()
+            outcome = 'error'
+            try:
+                result = func(*args, **kwargs)
+                outcome = 'success'
+                return result
+            finally:
+                release_job_lease(job, owner, started, outcome, interval_seconds)
+        return wrapper
+    return decorator
+
+def job_high_water(job):
+    row = get_db_connection().execute("SELECT high_water FROM job_leases WHERE job = ?;", [job]).fetchone()
+    return row['high_water'] if row else 0
+
+def set_job_high_water(job, value):
+    with db_transaction() as conn:
+        conn.execute("UPDATE job_leases SET high_water = MAX(high_water, ?) WHERE job = ?;", [value, job])
+
+# Email bodies
+# Rendered email HTML is stored once in email_bodies under its SHA-256 and
+# referenced by body_hash from notifications, the outbox and broadcasts, so a
+# broadcast to every student stores one body instead of one per student.
+# Bodies of EMAIL_BODY_COMPRESS_MIN_BYTES or more are zlib-compressed when
+# EMAIL_BODY_COMPRESSION is on. A daily job deletes notifications older than
+# EMAIL_RETENTION_DAYS and then the bodies nothing refers to any more.
+EMAIL_BODY_TABLES = ['email_notifications', 'email_notifications_archive', 'email_outbox', 'broadcasts']
+EMAIL_BODY_GRACE_SECONDS = 3600  # a body may be stored a moment before the row that refers to it
+
+def store_email_body(body, db=None):
+    """Store a body unless it is already stored and return its hash"""
+    body_hash = hashlib.sha256(body.encode()).hexdigest()
+    stored, compressed = body, 0
+    if app.config['EMAIL_BODY_COMPRESSION'] and len(body) >= app.config['EMAIL_BODY_COMPRESS_MIN_BYTES']:
+        packed = zlib.compress(body.encode(), 6)
+        if len(packed) < len(body.encode()):
+            stored, compressed = packed, 1
+    (db or get_db_connection()).execute(
+        "INSERT OR IGNORE INTO email_bodies (hash, body, compressed, size, created_at) VALUES (?, ?, ?, ?, ?);",
+        [body_hash, stored, compressed, len(body), time.time()]
+    )
+    return body_hash
+
+def decode_email_body(stored, compressed):
+    return zlib.decompress(stored).decode() if compressed else stored
+
+def load_email_body(body_hash):
+    """The body stored under body_hash, or None"""
+    row = execute_query("SELECT body, compressed FROM email_bodies WHERE hash = ?;", [body_hash], fetch=True)
+    return decode_email_body(row['body'], row['compressed']) if row else None
+
+def expire_notifications(conn, table, cutoff, batch_size):
+    """Delete sent or failed notifications dated before cutoff, one short transaction per batch"""
+    deleted = 0
+    while True:
+        with db_transaction():
+            count = conn.execute(f"""
+                DELETE FROM {table} WHERE id IN (
+                    SELECT id FROM {table} WHERE sent_date < ? AND status != 'Queued' ORDER BY sent_date, id LIMIT ?
+                );
+            """, [cutoff, batch_size]).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+@single_flight(hours=24)
+@timed_job
+def compact_email_storage():
+    """Apply the notification retention period and delete unreferenced email bodies"""
+    with app.app_context():
+        conn = get_db_connection()
+        removed = 0
+        days = app.config['EMAIL_RETENTION_DAYS']
+        if days > 0:
+            cutoff = date.today() - timedelta(days=days)
+            batch_size = app.config['EMAIL_RETENTION_BATCH_SIZE']
+            for table in ('email_notifications', 'email_notifications_archive'):
+                removed += expire_notifications(conn, table, cutoff.strftime("%Y-%m-%d"), batch_size)
+            with db_transaction():
+                cutoff_time = datetime.combine(cutoff, datetime.min.time()).isoformat(timespec='seconds')
+                conn.execute("DELETE FROM email_outbox WHERE status IN ('Sent', 'Dead') AND created_at < ?;", [cutoff_time])
+                conn.execute("DELETE FROM broadcasts WHERE status = 'Completed' AND created_at < ?;", [cutoff_time])
+        
+        references = " AND ".join(
+            f"NOT EXISTS (SELECT 1 FROM {table} WHERE body_hash = email_bodies.hash)" for table in EMAIL_BODY_TABLES
+        )
+        with db_transaction():
+            bodies = conn.execute(
+                f"DELETE FROM email_bodies WHERE created_at < ? AND {references};",
+                [time.time() - EMAIL_BODY_GRACE_SECONDS]
+            ).rowcount
+        if removed or bodies:
+            print(f"🧹 Removed {removed} expired notifications and {bodies} unreferenced email bodies")
+
+# Email outbox
+# Handlers never talk to the mail server. They add a row to email_outbox in the
+# same transaction as the change that caused the mail, and the scheduler drains
+# the outbox in the background with retries and exponential backoff.
+def queue_email(to_email, subject, message, attachment_path=None, notification_id=None, idempotency_key=None):
+    """Add an email to the outbox; a repeated idempotency key is ignored"""
+    if not idempotency_key:
+        idempotency_key = f"notification:{notification_id}" if notification_id else uuid.uuid4().hex
+    execute_query(
+        "INSERT OR IGNORE INTO email_outbox (idempotency_key, notification_id, to_email, subject, message, body_hash, attachment_path, next_attempt_at, created_at) VALUES (?, ?, ?, ?, '', ?, ?, ?, ?);",
+        [idempotency_key, notification_id, to_email, subject, store_email_body(message), attachment_path, time.time(), datetime.now().isoformat(timespec='seconds')]
+    )
+
+def record_notification(request_id, recipient_id, subject, message):
+    """Store a notification row in the Queued state and return its id"""
+    cursor = get_db_connection().execute(
+        "INSERT INTO email_notifications (request_id, recipient_id, subject, message, body_hash, sent_date, status) VALUES (?, ?, ?, '', ?, ?, 'Queued');",
+        [request_id, recipient_id, subject, store_email_body(message), date.today().strftime("%Y-%m-%d")]
+    )
+    return cursor.lastrowid
+
+def queue_notification_batch(emails):
+    """
+    Record and queue many notification emails in one transaction. Each
+    email is a dict with request_id, recipient_id, to_email, subject, message
+    and attachment_path; call inside db_transaction().
+    """
+    if not emails:
+        return
+    conn = get_db_connection()
+    hashes = {}
+    for email in emails:
+        if email['message'] not in hashes:
+            hashes[email['message']] = store_email_body(email['message'], conn)
+    today = date.today().strftime("%Y-%m-%d")
+    notification_ids = [conn.execute(
+        "INSERT INTO email_notifications (request_id, recipient_id, subject, message, body_hash, sent_date, status) VALUES (?, ?, ?, '', ?, ?, 'Queued');",
+        [email['request_id'], email['recipient_id'], email['subject'], hashes[email['message']], today]
+    ).lastrowid for email in emails]
+    now, created_at = time.time(), datetime.now().isoformat(timespec='seconds')
+    conn.executemany(
+        "INSERT OR IGNORE INTO email_outbox (idempotency_key, notification_id, to_email, subject, message, body_hash, attachment_path, next_attempt_at, created_at) VALUES (?, ?, ?, ?, '', ?, ?, ?, ?);",
+        [(f"notification:{notification_id}", notification_id, email['to_email'], email['subject'], hashes[email['message']],
+          email['attachment_path'], now, created_at) for notification_id, email in zip(notification_ids, emails)]
+    )
+
+def wake_job(job_id):
+    """Run a scheduler job now instead of waiting for its next interval"""
+    try:
+        scheduler.get_job(job_id).modify(next_run_time=datetime.now())
+    except Exception:
+        pass  # the regular interval picks the work up anyway
+
+def email_retry_delay(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = app.config['EMAIL_RETRY_BASE_SECONDS'] * (2 ** (attempts - 1))
+    delay = min(delay, app.config['EMAIL_RETRY_MAX_SECONDS'])
+    return delay * random.uniform(0.8, 1.2)
+
+@timed_job
+def dispatch_email_outbox():
+    """
+    Sends due outbox emails. Each row is claimed with a lease before sending so
+    several processes can drain the outbox without sending a mail twice.
+    """
+    if not mail_configured():
+        return  # keep mail queued until credentials are set
+
+    with app.app_context():
+        conn = get_db_connection()
+        now = time.time()
+        due = conn.execute("""
+            SELECT id FROM email_outbox
+            WHERE status IN ('Queued', 'Sending') AND next_attempt_at <= ?
+              AND (locked_until IS NULL OR locked_until < ?)
+            ORDER BY next_attempt_at
+            LIMIT ?;
+        """, [now, now, app.config['EMAIL_DISPATCH_BATCH_SIZE']]).fetchall()
+
+        for row in due:
+            now = time.time()
+            claimed = conn.execute("""
+                UPDATE email_outbox SET status = 'Sending', attempts = attempts + 1, locked_until = ?
+                WHERE id = ? AND status IN ('Queued', 'Sending') AND (locked_until IS NULL OR locked_until < ?);
+            """, [now + app.config['EMAIL_SEND_LEASE_SECONDS'], row['id'], now]).rowcount
+            conn.commit()
+            if not claimed:
+                continue  # another process got it first
+
+            mail = conn.execute("""
+                SELECT email_outbox.*, b.body, b.compressed FROM email_outbox
+                LEFT JOIN email_bodies b ON b.hash = email_outbox.body_hash
+                WHERE email_outbox.id = ?;
+            """, [row['id']]).fetchone()
+            body = decode_email_body(mail['body'], mail['compressed']) if mail['body'] is not None else mail['message']
+            message_id = f"<{hashlib.sha1(mail['idempotency_key'].encode()).hexdigest()}@campuscare>"
+            try:
+                deliver_email(mail['to_email'], mail['subject'], body,
+                              email_attachment_path(mail['attachment_path']), message_id)
+            except Exception as e:
+                print(f" Error sending outbox email {mail['id']} (attempt {mail['attempts']}): {e}")
+                with db_transaction():
+                    if mail['attempts'] >= app.config['EMAIL_MAX_ATTEMPTS']:
+                        # Dead-letter: keep the row for inspection, stop retrying
+                        conn.execute(
+                            "UPDATE email_outbox SET status = 'Dead', locked_until = NULL, last_error = ? WHERE id = ?;",
+                            [str(e), mail['id']]
+                        )
+                        conn.execute("UPDATE email_notifications SET status = 'Failed' WHERE id = ?;", [mail['notification_id']])
+                    else:
+                        conn.execute(
+                            "UPDATE email_outbox SET status = 'Queued', locked_until = NULL, last_error = ?, next_attempt_at = ? WHERE id = ?;",
+                            [str(e), time.time() + email_retry_delay(mail['attempts']), mail['id']]
+                        )
+                continue
+
+            with db_transaction():
+                conn.execute(
+                    "UPDATE email_outbox SET status = 'Sent', locked_until = NULL, last_error = NULL, sent_at = ? WHERE id = ?;",
+                    [datetime.now().isoformat(timespec='seconds'), mail['id']]
+                )
+                conn.execute("UPDATE email_notifications SET status = 'Sent' WHERE id = ?;", [mail['notification_id']])
+
+# Broadcasts
+# A broadcast sends one rendered message to every student. The notification
+# rows are written up front in a single executemany, then a background thread
+# walks them in batches and sends each batch from a few threads sharing the
+# SMTP connection pool. Progress is kept on the broadcasts row.
+BROADCAST_LEASE_SECONDS = 120
+
+def create_broadcast(subject, message):
+    """Store a broadcast and one Queued notification per student; returns the broadcast id"""
+    conn = get_db_connection()
+    body_hash = store_email_body(message, conn)
+    cursor = conn.execute(
+        "INSERT INTO broadcasts (subject, message, body_hash, created_at) VALUES (?, '', ?, ?);",
+        [subject, body_hash, datetime.now().isoformat(timespec='seconds')]
+    )
+    broadcast_id = cursor.lastrowid
     
+    students = execute_query("SELECT id FROM users WHERE role = 'Student';", fetchall=True)
+    sent_date = date.today().strftime("%Y-%m-%d")
+    conn.executemany(
+        "INSERT INTO email_notifications (recipient_id, subject, message, body_hash, sent_date, status, broadcast_id) VALUES (?, ?, '', ?, ?, 'Queued', ?);",
+        [(student['id'], subject, body_hash, sent_date, broadcast_id) for student in students]
+    )
+    conn.execute("UPDATE broadcasts SET total = ? WHERE id = ?;", [len(students), broadcast_id])
+    return broadcast_id
+
+def start_broadcast(broadcast_id):
+    """Send a broadcast on a background thread"""
+    threading.Thread(target=run_broadcast, args=(broadcast_id,), daemon=True).start()
+
+def _send_broadcast_chunk(broadcast, recipients):
+    """Send one slice of a batch over pooled SMTP connections; returns (sent_ids, failed_ids)"""
+    sent, failed = [], []
+    for recipient in recipients:
+        msg = build_email_message(recipient['email'], broadcast['subject'], broadcast['message'],
+                                  message_id=f"<broadcast-{broadcast['id']}-{recipient['id']}@campuscare>")
+        try:
+            smtp_pool.send(msg)
+            sent.append(recipient['id'])
+        except Exception as e:
+            print(f" Error sending broadcast {broadcast['id']} to {recipient['email']}: {e}")
+            failed.append(recipient['id'])
+    return sent, failed
+
+def run_broadcast(broadcast_id):
+    """Send all Queued notifications of a broadcast in bounded batches"""
+    if not mail_configured():
+        print(f"⚠️ Email credentials not configured. Broadcast {broadcast_id} stays queued.")
+        return
+
+    with app.app_context():
+        conn = get_db_connection()
+        now = time.time()
+        claimed = conn.execute("""
+            UPDATE broadcasts SET status = 'Sending', locked_until = ?, started_at = COALESCE(started_at, ?)
+            WHERE id = ? AND status != 'Completed' AND (locked_until IS NULL OR locked_until < ?);
+        """, [now + BROADCAST_LEASE_SECONDS, datetime.now().isoformat(timespec='seconds'), broadcast_id, now]).rowcount
+        conn.commit()
+        if not claimed:
+            return  # finished, or another thread/process is sending it
+
+        broadcast = dict(conn.execute("SELECT * FROM broadcasts WHERE id = ?;", [broadcast_id]).fetchone())
+        if broadcast['body_hash']:
+            broadcast['message'] = load_email_body(broadcast['body_hash'])
+        batch_size = app.config['BROADCAST_BATCH_SIZE']
+        connections = app.config['BROADCAST_CONNECTIONS']
+        started = time.time()
+        processed = 0
+        last_id = 0
+
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            while True:
+                batch = conn.execute("""
+                    SELECT en.id, u.email
+                    FROM email_notifications en
+                    JOIN users u ON en.recipient_id = u.id
+                    WHERE en.broadcast_id = ? AND en.status = 'Queued' AND en.id > ?
+                    ORDER BY en.id
+                    LIMIT ?;
+                """, [broadcast_id, last_id, batch_size]).fetchall()
+                if not batch:
+                    break
+                last_id = batch[-1]['id']
+
+                # Split the batch so each connection sends an even share
+                chunks = [batch[i::connections] for i in range(connections) if batch[i::connections]]
+                sent, failed = [], []
+                for chunk_sent, chunk_failed in executor.map(lambda chunk: _send_broadcast_chunk(broadcast, chunk), chunks):
+                    sent.extend(chunk_sent)
+                    failed.extend(chunk_failed)
+
+                with db_transaction():
+                    conn.executemany("UPDATE email_notifications SET status = 'Sent' WHERE id = ?;", [(i,) for i in sent])
+                    conn.executemany("UPDATE email_notifications SET status = 'Failed' WHERE id = ?;", [(i,) for i in failed])
+                    conn.execute(
+                        "UPDATE broadcasts SET sent = sent + ?, failed = failed + ?, locked_until = ? WHERE id = ?;",
+                        [len(sent), len(failed), time.time() + BROADCAST_LEASE_SECONDS, broadcast_id]
+                    )
+
+                processed += len(batch)
+                elapsed = time.time() - started
+                print(f"📣 Broadcast {broadcast_id}: {processed}/{broadcast['total']} processed "
+                      f"({processed / elapsed if elapsed else 0:.1f} emails/s)")
+
+        conn.execute(
+            "UPDATE broadcasts SET status = 'Completed', locked_until = NULL, finished_at = ? WHERE id = ?;",
+            [datetime.now().isoformat(timespec='seconds'), broadcast_id]
+        )
+        conn.commit()
+
+@timed_job
+def resume_broadcasts():
+    """Pick up broadcasts that were interrupted, e.g. by a worker restart"""
+    with app.app_context():
+        pending = execute_query(
+            "SELECT id FROM broadcasts WHERE status != 'Completed' AND (locked_until IS NULL OR locked_until < ?);",
+            [time.time()], fetchall=True
+        )
+    for broadcast in pending:
+        run_broadcast(broadcast['id'])
+
+def broadcast_progress(broadcast_id):
+    """Progress and throughput of a broadcast as a dictionary"""
+    broadcast = execute_query(
+        "SELECT id, subject, total, sent, failed, status, created_at, started_at, finished_at FROM broadcasts WHERE id = ?;",
+        [broadcast_id], fetch=True
+    )
+    if not broadcast:
+        return None
+    progress = row_to_dict(broadcast)
+    processed = progress['sent'] + progress['failed']
+    elapsed = None
+    if progress['started_at']:
+        end = datetime.fromisoformat(progress['finished_at']) if progress['finished_at'] else datetime.now()
+        elapsed = max((end - datetime.fromisoformat(progress['started_at'])).total_seconds(), 0)
+    progress['processed'] = processed
+    progress['percent'] = round(100 * processed / progress['total'], 1) if progress['total'] else 100.0
+    progress['elapsed_seconds'] = elapsed
+    progress['emails_per_second'] = round(processed / elapsed, 2) if elapsed else None
+    return progress
+
+# Request details with student and worker information for status emails
+STATUS_EMAIL_QUERY = """
+    SELECT requests.*, 
+           students.username as student_name, students.email as student_email,
+           workers.username as worker_name, workers.email as worker_email
+    FROM requests 
+    LEFT JOIN users as students ON requests.studentID = students.id 
+    LEFT JOIN users as workers ON requests.workerID = workers.id 
+    WHERE requests.id IN ({placeholders});
+"""
+
+def status_update_emails(request_data, status, worker_notes=None, worker_image_path=None):
+    """Status update emails for one request: to the student, and to the worker if assigned"""
     # Prepare email content based on status
     if status == "In Progress":
         subject = f"Request Update: {request_data['title']} - In Progress"
@@ -397,22 +2527,15 @@ def send_status_update_email(request_id, status, worker_notes=None, worker_image
         <p>Login to CampusCare for more details: <a href="/">CampusCare Portal</a></p>
         """
     
-    # Store notification in database
-    today = date.today()
-    execute_query(
-        "INSERT INTO email_notifications (request_id, recipient_id, subject, message, sent_date) VALUES (?, ?, ?, ?, ?);",
-        [request_id, request_data['studentID'], subject, email_content, today.strftime("%Y-%m-%d")]
-    )
-    
-    # Send email to student with optional attachment
+    # Email to student with optional attachment
     attachment_path = None
     if worker_image_path:
         attachment_path = os.path.join(app.config['UPLOAD_FOLDER'], worker_image_path)
     
-    student_email_sent = send_email(request_data['student_email'], subject, email_content, attachment_path)
+    emails = [{'request_id': request_data['id'], 'recipient_id': request_data['studentID'], 'to_email': request_data['student_email'],
+               'subject': subject, 'message': email_content, 'attachment_path': attachment_path}]
     
-    # Send notification to worker if assigned
-    worker_email_sent = False
+    # Notification to worker if assigned
     if request_data['workerID'] and request_data['worker_email']:
         worker_subject = f"Task Assignment: {request_data['title']}"
         
@@ -477,32 +2600,314 @@ def send_status_update_email(request_id, status, worker_notes=None, worker_image
             <p><a href="/worker">View Task Details</a></p>
             """
         
-        # Store worker notification in database
-        execute_query(
-            "INSERT INTO email_notifications (request_id, recipient_id, subject, message, sent_date) VALUES (?, ?, ?, ?, ?);",
-            [request_id, request_data['workerID'], worker_subject, worker_message, today.strftime("%Y-%m-%d")]
-        )
-        
-        # Send email to worker
-        worker_email_sent = send_email(request_data['worker_email'], worker_subject, worker_message)
+        emails.append({'request_id': request_data['id'], 'recipient_id': request_data['workerID'], 'to_email': request_data['worker_email'],
+                       'subject': worker_subject, 'message': worker_message, 'attachment_path': None})
+    
+    return emails
+
+def queue_status_update_email(request_id, status, worker_notes=None, worker_image_path=None):
+    """Queue status update email for a specific request to student and worker"""
+    request_data = execute_query(STATUS_EMAIL_QUERY.format(placeholders="?"), [request_id], fetch=True)
+    
+    if not request_data:
+        print(f"Request {request_id} not found")
+        return False
+    
+    emails = status_update_emails(request_data, status, worker_notes, worker_image_path)
+    queue_notification_batch(emails)
     
     # Also log to console for debugging
-    print(f"\n📧 EMAIL NOTIFICATIONS")
-    print(f"To Student: {request_data['student_email']} ({'SENT' if student_email_sent else 'FAILED'})")
+    print(f"\n📧 EMAIL NOTIFICATIONS QUEUED")
+    print(f"To Student: {request_data['student_email']}")
     if request_data['workerID']:
-        print(f"To Worker: {request_data['worker_email']} ({'SENT' if worker_email_sent else 'FAILED'})")
-    print(f"Subject: {subject}")
+        print(f"To Worker: {request_data['worker_email']}")
+    print(f"Subject: {emails[0]['subject']}")
     print(f"Request: {request_data['title']} (ID: {request_data['id']})")
     print(f"Status: {status}")
     if worker_image_path:
         print(f"Attachment: {worker_image_path}")
     print("---\n")
     
-    return student_email_sent
+    return True
+
+# Image derivatives
+# Uploaded photos are kept as-is, but pages and emails use smaller copies: a
+# square-bounded WebP thumbnail for lists and a JPEG preview for modals and
+# attachments. Both are re-encoded from pixels only, which drops EXIF data.
+# A scheduler job creates them after upload and records their paths on the row.
+IMAGE_DERIVATIVE_COLUMNS = [
+    # (table, original column, thumbnail column, preview column)
+    ('requests', 'image_path', 'image_thumb', 'image_preview'),
+    ('requests', 'worker_image_path', 'worker_image_thumb', 'worker_image_preview'),
+    ('lost_items', 'image_path', 'image_thumb', 'image_preview'),
+]
+
+def derivative_paths(image_path):
+    """Upload-relative paths of the thumbnail and preview for an uploaded image"""
+    stem = os.path.splitext(image_path)[0]
+    return f"derived/{stem}_thumb.webp", f"derived/{stem}_preview.jpg"
+
+def create_image_derivatives(image_path):
+    """Write the thumbnail and preview for an upload; returns their paths or None if not possible"""
+    if Image is None:
+        return None
+    source = os.path.join(app.config['UPLOAD_FOLDER'], image_path)
+    thumb_path, preview_path = derivative_paths(image_path)
+    thumb_file = os.path.join(app.config['UPLOAD_FOLDER'], thumb_path)
+    preview_file = os.path.join(app.config['UPLOAD_FOLDER'], preview_path)
+    if os.path.exists(thumb_file) and os.path.exists(preview_file):
+        return thumb_path, preview_path
+    
+    try:
+        with Image.open(source) as original:
+            image = ImageOps.exif_transpose(original)  # keep phone photos upright once EXIF is gone
+            image = image.convert('RGB')
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        print(f"Could not create derivatives for {image_path}: {e}")
+        return None
+    
+    os.makedirs(os.path.dirname(thumb_file), exist_ok=True)
+    preview = image.copy()
+    preview.thumbnail(app.config['PREVIEW_SIZE'])
+    preview.save(preview_file, 'JPEG', quality=82, optimize=True, progressive=True)
+    image.thumbnail(app.config['THUMBNAIL_SIZE'])
+    image.save(thumb_file, 'WEBP', quality=75, method=4)
+    return thumb_path, preview_path
+
+@timed_job
+def generate_image_derivatives():
+    """Create derivatives for uploads that do not have them yet"""
+    with app.app_context():
+        for table, column, thumb_column, preview_column in IMAGE_DERIVATIVE_COLUMNS:
+            while True:
+                rows = execute_query(
+                    f"SELECT id, {column} as image_path FROM {table} WHERE {column} IS NOT NULL AND {thumb_column} IS NULL LIMIT 50;",
+                    fetchall=True
+                )
+                if not rows:
+                    break
+                for row in rows:
+                    paths = create_image_derivatives(row['image_path'])
+                    # An empty string marks an image that cannot be converted, so it is not retried
+                    thumb_path, preview_path = paths if paths else ('', '')
+                    execute_query(
+                        f"UPDATE {table} SET {thumb_column} = ?, {preview_column} = ? WHERE id = ?;",
+                        [thumb_path, preview_path, row['id']]
+                    )
+
+def email_attachment_path(attachment_path):
+    """Attach the preview of an uploaded image instead of the full-size original"""
+    if not attachment_path:
+        return attachment_path
+    image_path = os.path.relpath(attachment_path, app.config['UPLOAD_FOLDER'])
+    paths = create_image_derivatives(image_path)
+    if not paths:
+        return attachment_path
+    return os.path.join(app.config['UPLOAD_FOLDER'], paths[1])
+
+# Upload storage
+# Files are stored under the SHA-256 of their content, sharded by the first two
+# byte pairs of the hash (ab/cd/abcd...ef.jpg), so an identical photo uploaded
+# twice is kept once and no directory grows without bound. The uploads table
+# counts the rows referencing each file; triggers on the image columns keep the
+# count current and a scheduler job deletes files that nothing references.
+UPLOAD_REFERENCE_COLUMNS = [(table, column) for table, column, _, _ in IMAGE_DERIVATIVE_COLUMNS]
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def content_address(digest, extension):
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
 
+def register_upload(path, size):
+    """Record a stored file; it counts as orphaned until a row references it"""
+    execute_query("""
+        INSERT INTO uploads (path, refcount, size, orphaned_at) VALUES (?, 0, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET size = excluded.size,
+            orphaned_at = CASE WHEN refcount <= 0 THEN excluded.orphaned_at END;
+    """, [path, size, time.time()])
+
+def store_upload_stream(stream, extension):
+    """Copy a stream to disk while hashing it and move it to its content address"""
+    upload_folder = app.config['UPLOAD_FOLDER']
+    tmp_folder = os.path.join(upload_folder, 'tmp')
+    os.makedirs(tmp_folder, exist_ok=True)
+    started = time.perf_counter()
+    fd, tmp_file = tempfile.mkstemp(dir=tmp_folder)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        
+        path = content_address(digest.hexdigest(), extension)
+        # Register before checking the disk so the collector cannot remove an existing copy under us
+        register_upload(path, size)
+        destination = os.path.join(upload_folder, path)
+        if os.path.exists(destination):
+            os.remove(tmp_file)
+            metrics.inc('campuscare_upload_deduplicated_total')
+        else:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(tmp_file, destination)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    metrics.observe('campuscare_upload_size_bytes', size)
+    metrics.observe('campuscare_upload_save_duration_seconds', time.perf_counter() - started)
+    return path
+
+def save_upload(file):
+    """Store an uploaded file and return its path relative to the upload folder"""
+    extension = file.filename.rsplit('.', 1)[1].lower()
+    return store_upload_stream(file.stream, extension)
+
+def upload_reference_triggers(table, column):
+    """Triggers that keep uploads.refcount in step with one image column"""
+    increment = f"""
+        INSERT INTO uploads (path, refcount) SELECT NEW.{column}, 1 WHERE NEW.{column} IS NOT NULL
+        ON CONFLICT(path) DO UPDATE SET refcount = refcount + 1, orphaned_at = NULL;"""
+    decrement = f"""
+        UPDATE uploads SET refcount = refcount - 1,
+            orphaned_at = CASE WHEN refcount <= 1 THEN CAST(strftime('%s', 'now') AS REAL) END
+        WHERE path = OLD.{column};"""
+    name = f"trg_{table}_{column}_uploads"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table} BEGIN {increment} END;",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table} BEGIN {decrement} END;",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {column} ON {table}
+            WHEN OLD.{column} IS NOT NEW.{column} BEGIN {decrement} {increment} END;""",
+    ]
+
+def rebuild_upload_refcounts(cursor):
+    """Recount references to every upload from the image columns"""
+    cursor.execute("UPDATE uploads SET refcount = 0;")
+    archived = ARCHIVE_UPLOAD_REFERENCE_COLUMNS if table_exists(cursor, "requests_archive") else []
+    for table, column in UPLOAD_REFERENCE_COLUMNS + archived:
+        cursor.execute(f"""
+            INSERT INTO uploads (path, refcount) SELECT {column}, COUNT(*) FROM {table}
+            WHERE {column} IS NOT NULL GROUP BY {column}
+            ON CONFLICT(path) DO UPDATE SET refcount = refcount + excluded.refcount;
+        """)
+    cursor.execute("UPDATE uploads SET orphaned_at = NULL WHERE refcount > 0;")
+    cursor.execute("UPDATE uploads SET orphaned_at = ? WHERE refcount <= 0 AND orphaned_at IS NULL;", [time.time()])
+
+@timed_job
+def collect_upload_garbage():
+    """Delete uploads (and their derivatives) that have been unreferenced for the grace period"""
+    with app.app_context():
+        conn = get_db_connection()
+        upload_folder = app.config['UPLOAD_FOLDER']
+        cutoff = time.time() - app.config['UPLOAD_GC_GRACE_SECONDS']
+        removed = 0
+        freed = 0
+        last_path = ''
+        while True:
+            rows = conn.execute(
+                "SELECT path, size FROM uploads WHERE refcount <= 0 AND orphaned_at < ? AND path > ? ORDER BY path LIMIT 100;",
+                [cutoff, last_path]
+            ).fetchall()
+            if not rows:
+                break
+            last_path = rows[-1]['path']
+            for row in rows:
+                stored_file = os.path.join(upload_folder, row['path'])
+                # Move the file aside first: an upload of the same content that races with us
+                # then either resets orphaned_at (and we put the file back) or writes a new copy
+                parked_file = stored_file + '.gc'
+                try:
+                    os.replace(stored_file, parked_file)
+                except FileNotFoundError:
+                    parked_file = None
+                deleted = conn.execute(
+                    "DELETE FROM uploads WHERE path = ? AND refcount <= 0 AND orphaned_at < ?;",
+                    [row['path'], cutoff]
+                ).rowcount
+                conn.commit()
+                if not deleted:
+                    if parked_file:
+                        os.replace(parked_file, stored_file)
+                    continue
+                
+                if parked_file:
+                    os.remove(parked_file)
+                for derived in derivative_paths(row['path']):
+                    derived_file = os.path.join(upload_folder, derived)
+                    if os.path.exists(derived_file):
+                        os.remove(derived_file)
+                removed += 1
+                freed += row['size'] or 0
+        
+        # Leftovers of uploads that failed half-way
+        tmp_folder = os.path.join(upload_folder, 'tmp')
+        if os.path.isdir(tmp_folder):
+            for entry in os.scandir(tmp_folder):
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+        
+        if removed:
+            print(f"🧹 Removed {removed} unreferenced uploads, freed {freed / 1024:.0f} KB")
+
+# Request archive
+# Completed requests older than ARCHIVE_AFTER_DAYS are moved, with their email
+# notifications, into requests_archive and email_notifications_archive in
+# batches, so the dashboards and their indexes only cover live work. Rows keep
+# their ids. A request whose mail is still in the outbox waits for the next run.
+# The admin page loads the archive page by page on demand.
+ARCHIVE_DERIVATIVE_COLUMNS = [('requests_archive', column, thumb_column, preview_column)
+                              for table, column, thumb_column, preview_column in IMAGE_DERIVATIVE_COLUMNS
+                              if table == 'requests']
+ARCHIVE_UPLOAD_REFERENCE_COLUMNS = [(table, column) for table, column, _, _ in ARCHIVE_DERIVATIVE_COLUMNS]
+
+def archive_columns(conn, archive):
+    """Columns an archive table shares with its live table"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({archive});") if row[1] != 'archived_at']
+
+@single_flight(hours=1)
+@timed_job
+def archive_completed_requests():
+    """Move old Completed requests and their notifications into the archive tables"""
+    cutoff = (date.today() - timedelta(days=app.config['ARCHIVE_AFTER_DAYS'])).strftime("%Y-%m-%d")
+    batch_size = app.config['ARCHIVE_BATCH_SIZE']
+    with app.app_context():
+        conn = get_db_connection()
+        columns = {archive: ", ".join(archive_columns(conn, archive)) for _, archive in ARCHIVE_TABLES}
+        archived = 0
+        while True:
+            with db_transaction():
+                ids = [row['id'] for row in conn.execute(ARCHIVE_CANDIDATES_QUERY, [cutoff, batch_size])]
+                if not ids:
+                    break
+                placeholders = ", ".join("?" for _ in ids)
+                archived_at = datetime.now().isoformat(timespec='seconds')
+                # Copy before deleting so upload reference counts never reach zero
+                request_columns = columns['requests_archive']
+                conn.execute(f"""
+                    INSERT INTO requests_archive ({request_columns}, archived_at)
+                    SELECT {request_columns}, ? FROM requests WHERE id IN ({placeholders});
+                """, [archived_at] + ids)
+                notification_columns = columns['email_notifications_archive']
+                conn.execute(f"""
+                    INSERT INTO email_notifications_archive ({notification_columns}, archived_at)
+                    SELECT {notification_columns}, ? FROM email_notifications WHERE request_id IN ({placeholders});
+                """, [archived_at] + ids)
+                conn.execute(f"DELETE FROM email_notifications WHERE request_id IN ({placeholders});", ids)
+                conn.execute(f"DELETE FROM requests WHERE id IN ({placeholders});", ids)
+            archived += len(ids)
+            if len(ids) < batch_size:
+                break
+        if archived:
+            print(f"🗄️ Archived {archived} completed requests dated before {cutoff}")
+
+@single_flight(minutes=15)
+@timed_job
 def check_for_pending_requests():
     """
-    Checks the database for pending requests and sends an email to the admin.
+    Emails the admin about requests that became pending since the last reminder.
+    Only the process holding the job lease runs it, and the highest pending
+    version already reported is kept as the job's high-water mark.
     """
     with app.app_context():
         conn = get_db_connection()
@@ -512,11 +2917,17 @@ def check_for_pending_requests():
         cursor.execute("SELECT username, email FROM users WHERE role = 'Admin' LIMIT 1;")
         admin_data = cursor.fetchone()
         
-        # Count the number of pending requests
-        cursor.execute("SELECT COUNT(*) FROM requests WHERE status = 'Pending';")
-        pending_count = cursor.fetchone()[0]
+        # Count the requests that became pending since the last reminder
+        high_water = job_high_water('check_for_pending_requests')
+        cursor.execute(
+            "SELECT COUNT(*), MAX(pending_version) FROM requests WHERE status = 'Pending' AND pending_version > ?;",
+            [high_water]
+        )
+        pending_count, newest_version = cursor.fetchone()
+        cursor.execute("SELECT COALESCE(SUM(count), 0) FROM request_counters WHERE scope = 'global' AND scope_id = '' AND status = 'Pending';")
+        total_pending = cursor.fetchone()[0]
         
-        conn.close()
+        cursor.close()
 
         if pending_count > 0 and admin_data:
             admin_name = admin_data['username']
@@ -571,7 +2982,7 @@ def check_for_pending_requests():
                         Action Required: New Pending Service Requests
                     </div>
                     <p>Hello {admin_name},</p>
-                    <p>There are currently <span class="highlight">{pending_count}</span> service requests with a 'Pending' status that require your attention.</p>
+                    <p>There are <span class="highlight">{pending_count}</span> new service requests with a 'Pending' status that require your attention ({total_pending} pending in total).</p>
                     <p>Please log in to the CampusCare Admin Dashboard to review and assign these tasks to a worker.</p>
                     <a href="http://localhost:5000/admin" class="link-btn">Login to CampusCare Portal</a>
                 </div>
@@ -580,10 +2991,393 @@ def check_for_pending_requests():
             """
             
             # Send the email with HTML content
-            print(f"Found {pending_count} pending requests. Sending email to admin.")
-            send_email(admin_email, subject, html_message)
+            print(f"Found {pending_count} new pending requests. Sending email to admin.")
+            if send_email(admin_email, subject, html_message):
+                set_job_high_water('check_for_pending_requests', newest_version)
+        else:
+            print("No new pending requests found. No email sent.")
+
+# Static files and compression
+# CSS and JS are read once, hashed and precompressed. Templates get URLs with a
+# ?v=<hash> fingerprint, and fingerprinted requests are cached for a year.
+# Content-addressed uploads never change under the same name, so they are
+# immutable too; other uploads carry a strong ETag and are revalidated.
+# HTML and JSON responses are compressed with brotli or gzip, whichever the
+# client accepts.
+PRECOMPRESSED_EXTENSIONS = ('.css', '.js')
+CONTENT_ADDRESSED_UPLOAD = re.compile(r'^(?:derived/)?[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(_thumb|_preview)?\.\w+$')
+COMPRESSIBLE_MIMETYPES = {'text/html', 'application/json', 'text/css', 'application/javascript', 'text/javascript'}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+_static_assets = {}
+_static_assets_lock = threading.Lock()
+
+def compress_body(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=app.config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(body, compresslevel=app.config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+def load_static_asset(filename):
+    """Read, hash and precompress a CSS/JS file; returns its cache entry"""
+    path = os.path.join(app.static_folder, filename)
+    mtime = os.stat(path).st_mtime
+    cached = _static_assets.get(filename)
+    if cached and cached['mtime'] == mtime:
+        return cached
+    
+    with open(path, 'rb') as f:
+        body = f.read()
+    asset = {
+        'mtime': mtime,
+        'digest': hashlib.sha256(body).hexdigest()[:16],
+        'mimetype': 'text/css' if filename.endswith('.css') else 'text/javascript',
+        'identity': body,
+        'gzip': compress_body(body, 'gzip'),
+    }
+    if brotli is not None:
+        asset['br'] = compress_body(body, 'br')
+    with _static_assets_lock:
+        _static_assets[filename] = asset
+    return asset
+
+def static_asset(filename):
+    if not filename or not filename.endswith(PRECOMPRESSED_EXTENSIONS) or '/' in filename:
+        return None
+    try:
+        return load_static_asset(filename)
+    except OSError:
+        return None
+
+def preferred_encoding(available):
+    """Best content coding the client accepts out of the ones we have"""
+    for encoding in ('br', 'gzip'):
+        if encoding in available and request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+def precompress_static_assets():
+    for entry in os.scandir(app.static_folder):
+        if entry.is_file() and entry.name.endswith(PRECOMPRESSED_EXTENSIONS):
+            load_static_asset(entry.name)
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    if endpoint == 'static':
+        asset = static_asset(values.get('filename'))
+        if asset:
+            values.setdefault('v', asset['digest'])
+
+@functools.lru_cache(maxsize=2048)
+def file_digest(path, mtime, size):
+    """sha256 of a file; mtime and size are part of the cache key so a changed file is hashed again"""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+def legacy_upload_etag(path):
+    """Content hash of an upload stored under its original name, cached by mtime and size"""
+    stat = os.stat(path)
+    return file_digest(path, stat.st_mtime, stat.st_size)
+
+def serve_static(filename):
+    """Replacement for Flask's static view with fingerprint-aware caching"""
+    asset = static_asset(filename)
+    if asset:
+        encoding = preferred_encoding(asset)
+        response = app.response_class(asset[encoding or 'identity'], mimetype=asset['mimetype'])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(asset['digest'])
+        if request.args.get('v') == asset['digest']:
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    
+    if filename.startswith('uploads/'):
+        upload_path = filename[len('uploads/'):]
+        response = send_from_directory(app.config['UPLOAD_FOLDER'], upload_path, etag=False)
+        content_addressed = CONTENT_ADDRESSED_UPLOAD.match(upload_path)
+        if content_addressed:
+            response.set_etag(content_addressed.group(1) + (content_addressed.group(2) or ''))
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.set_etag(legacy_upload_etag(os.path.join(app.config['UPLOAD_FOLDER'], upload_path)))
+            response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    
+    return send_from_directory(app.static_folder, filename)
+
+app.view_functions['static'] = serve_static
+
+@app.after_request
+def compress_response(response):
+    """Compress HTML and JSON bodies when the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    encoding = preferred_encoding(('br', 'gzip') if brotli is not None else ('gzip',))
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if not encoding or len(body) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    
+    response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)  # the compressed bytes differ from the plain ones
+    return response
+
+precompress_static_assets()
+
+# Conditional GET for dashboard pages
+# Pages that are refreshed all day (student, worker, lost & found) carry an
+# ETag built from the change versions of the data they show, the logged-in
+# user and the templates. Triggers bump the versions on every write, so an
+# unchanged page is answered with 304 after a single primary-key lookup.
+# Pages with pending flash messages are never cached.
+def templates_version():
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(os.path.join(app.root_path, app.template_folder))):
+        with open(os.path.join(app.root_path, app.template_folder, name), 'rb') as f:
+            digest.update(f.read())
+    for asset in sorted(_static_assets):
+        digest.update(_static_assets[asset]['digest'].encode())
+    return digest.hexdigest()[:16]
+
+TEMPLATES_VERSION = templates_version()
+
+def page_etag(*scopes):
+    """ETag for the current user's view of pages built from the given scopes, or None if not cacheable"""
+    if request.method != 'GET' or session.get('_flashes'):
+        return None
+    placeholders = ", ".join("?" for _ in scopes)
+    versions = dict(execute_query(
+        f"SELECT scope, version FROM change_versions WHERE scope IN ({placeholders});",
+        list(scopes), fetchall=True
+    ))
+    parts = [TEMPLATES_VERSION, session.get('role'), str(session.get('user_id')), session.get('username')]
+    parts += [f"{scope}={versions.get(scope, 0)}" for scope in scopes]
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+
+def conditional_page(*scopes):
+    """Return (etag, 304 response or None) for a dashboard page"""
+    etag = page_etag(*scopes)
+    # compress_response appends the encoding to ETags, so accept those forms too
+    if etag and any(request.if_none_match.contains(tag) for tag in (etag, f"{etag}-gzip", f"{etag}-br")):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return etag, response
+    return etag, None
+
+def with_etag(body, etag):
+    response = make_response(body)
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Live events
+# Status changes, new assignments and new lost items are written to the
+# live_events table in the same transaction as the change, one row per
+# audience ('student:<id>', 'worker:<id>' or 'students'). Every process runs a
+# single poller thread that reads new rows and hands them to the /events
+# streams open in that process, so a browser hears about a change whichever
+# process made it. Row ids are the SSE event ids, which lets a reconnecting
+# browser replay what it missed via Last-Event-ID.
+def publish_event(event_type, audiences, **payload):
+    """Record a live event for the given audiences; call inside db_transaction()"""
+    data = json.dumps(payload)
+    now = time.time()
+    get_db_connection().executemany(
+        "INSERT INTO live_events (type, audience, payload, created_at) VALUES (?, ?, ?, ?);",
+        [(event_type, audience, data, now) for audience in audiences]
+    )
+
+def event_audiences():
+    """Audiences the logged-in user may hear from"""
+    if session.get('role') == 'Student':
+        return [f"student:{session['user_id']}", "students"]
+    if session.get('role') == 'Worker':
+        return [f"worker:{session['user_id']}"]
+    return []
+
+class LiveEventBroker:
+    """Fans new live_events rows out to the /events streams of this process"""
+
+    def __init__(self, max_connections, poll_interval):
+        self.max_connections = max_connections
+        self.poll_interval = poll_interval
+        self._subscribers = {}  # queue -> set of audiences
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def subscribe(self, audiences):
+        """Register a stream; returns its queue, or None when this process is at its connection cap"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_connections:
+                return None
+            events = queue.Queue(maxsize=1000)
+            self._subscribers[events] = set(audiences)
+            metrics.set('campuscare_live_event_connections', len(self._subscribers))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name="live-events", daemon=True)
+                self._thread.start()
+        return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            self._subscribers.pop(events, None)
+            metrics.set('campuscare_live_event_connections', len(self._subscribers))
+
+    def is_subscribed(self, events):
+        with self._lock:
+            return events in self._subscribers
+
+    def connections(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def wake(self):
+        """Poll now instead of at the next interval, e.g. right after publishing"""
+        self._wakeup.set()
+
+    def _poll(self):
+        conn = open_db_connection()
+        try:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM live_events;").fetchone()[0]
+            while True:
+                rows = conn.execute(
+                    "SELECT id, type, audience, payload FROM live_events WHERE id > ? ORDER BY id LIMIT 500;",
+                    [last_id]
+                ).fetchall()
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                    subscribers = list(self._subscribers.items())
+                for row in rows:
+                    last_id = row['id']
+                    for events, audiences in subscribers:
+                        if row['audience'] not in audiences:
+                            continue
+                        try:
+                            events.put_nowait(row)
+                        except queue.Full:
+                            # Too slow to keep up: end its stream, the browser reconnects and replays
+                            self.unsubscribe(events)
+                if len(rows) < 500:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+        except Exception as e:
+            print(f"Live event poller stopped: {e}")
+            with self._lock:
+                self._thread = None
+        finally:
+            conn.close()
+
+live_events = LiveEventBroker(app.config['LIVE_EVENTS_MAX_CONNECTIONS'], app.config['LIVE_EVENTS_POLL_SECONDS'])
+
+def format_event(row):
+    return f"id: {row['id']}\nevent: {row['type']}\ndata: {row['payload']}\n\n"
+
+def event_stream(events, replay, last_id):
+    """SSE body: missed events first, then live ones, with keepalive comments in between"""
+    try:
+        yield f"retry: {app.config['LIVE_EVENTS_RETRY_MS']}\n\n"
+        for row in replay:
+            last_id = row['id']
+            yield format_event(row)
+        while True:
+            try:
+                row = events.get(timeout=app.config['LIVE_EVENTS_HEARTBEAT_SECONDS'])
+            except queue.Empty:
+                if not live_events.is_subscribed(events):
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if row['id'] > last_id:
+                last_id = row['id']
+                yield format_event(row)
+    finally:
+        live_events.unsubscribe(events)
+
+@timed_job
+def prune_live_events():
+    """Delete live events older than the replay window"""
+    with app.app_context():
+        cutoff = time.time() - app.config['LIVE_EVENTS_RETENTION_SECONDS']
+        execute_query("DELETE FROM live_events WHERE created_at < ?;", [cutoff])
+
+# Live updates for the student and worker pages (Server-Sent Events)
+@app.route("/events")
+def events():
+    if 'user_id' not in session:
+        return jsonify({"error": "Access denied"}), 403
+    audiences = event_audiences()
+    if not audiences:
+        return jsonify({"error": "No live events for this role"}), 403
+    
+    subscription = live_events.subscribe(audiences)
+    if subscription is None:
+        return jsonify({"error": "Too many live connections, try again later"}), 503, {'Retry-After': '30'}
+    
+    # Subscribe before reading the backlog so nothing falls between the two;
+    # a failed read must give the subscription back
+    try:
+        resume_from = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        replay = []
+        if resume_from and resume_from.isdigit():
+            last_id = int(resume_from)
+            placeholders = ", ".join("?" for _ in audiences)
+            replay = execute_query(
+                f"SELECT id, type, payload FROM live_events WHERE id > ? AND audience IN ({placeholders}) ORDER BY id LIMIT ?;",
+                [last_id] + audiences + [app.config['LIVE_EVENTS_REPLAY_LIMIT']], fetchall=True
+            )
         else:
-            print("No pending requests found. No email sent.")
+            last_id = execute_query("SELECT COALESCE(MAX(id), 0) as id FROM live_events;", fetch=True)['id']
+        
+        response = app.response_class(
+            event_stream(subscription, replay, last_id),
+            mimetype="text/event-stream",
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    except Exception:
+        live_events.unsubscribe(subscription)
+        raise
+    # Also covers a client that goes away before the stream's first chunk
+    response.call_on_close(lambda: live_events.unsubscribe(subscription))
+    return response
+
+# Request metrics
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe('campuscare_http_request_duration_seconds', time.perf_counter() - started,
+                        {'endpoint': endpoint, 'method': request.method})
+        metrics.inc('campuscare_http_requests_total',
+                    {'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)})
+    return response
+
+# Prometheus scrape endpoint
+@app.route("/metrics")
+def metrics_endpoint():
+    token = app.config['METRICS_TOKEN']
+    allowed = session.get('role') == 'Admin' or bool(token) and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}")
+    if not allowed:
+        return jsonify({"error": "Access denied"}), 403
+    return app.response_class(render_metrics(), mimetype="text/plain; version=0.0.4")
 
 # login
 @app.route("/", methods=["GET","POST"])
@@ -602,59 +3396,11 @@ def login():
 
         # Admin login
         if adminID and adminPass:
-            user = execute_query("SELECT * FROM users WHERE email = ? AND role = 'Admin';", [adminID], fetch=True)
-            if user:
-                try:
-                    if check_password_hash(user["password"], adminPass):
-                        session["username"] = user["username"]
-                        session["user_id"] = user["id"]
-                        session["role"] = user["role"]
-                        return redirect("/admin", )
-                    else:
-                        flash("Incorrect Password!", "danger")
-                except ValueError:
-                    # Handle legacy password format
-                    if check_legacy_password(user["password"], adminPass):
-                        # Rehash with current method
-                        hashed = generate_password_hash(adminPass)
-                        execute_query("UPDATE users SET password = ? WHERE id = ?;", [hashed, user["id"]])
-                        session["username"] = user["username"]
-                        session["user_id"] = user["id"]
-                        session["role"] = user["role"]
-                        return redirect("/admin")
-                    else:
-                        flash("Incorrect Password!", "danger")
-            else:
-                flash("Admin Account Not Found!", "danger")
-            return render_template("index.html")
+            return password_login("Admin", adminID, adminPass, "/admin")
 
         # student login
         if studentID and studentPass:
-            user = execute_query("SELECT * FROM users WHERE email = ? AND role = 'Student';", [studentID], fetch=True)
-            if user:
-                try:
-                    if check_password_hash(user["password"], studentPass):
-                        session["username"] = user["username"]
-                        session["user_id"] = user["id"]
-                        session["role"] = user["role"]
-                        return redirect("/student")
-                    else:
-                        flash("Incorrect Password!", "danger")
-                except ValueError:
-                    # Handle legacy password format
-                    if check_legacy_password(user["password"], studentPass):
-                        # Rehash with current method
-                        hashed = generate_password_hash(studentPass)
-                        execute_query("UPDATE users SET password = ? WHERE id = ?;", [hashed, user["id"]])
-                        session["username"] = user["username"]
-                        session["user_id"] = user["id"]
-                        session["role"] = user["role"]
-                        return redirect("/student")
-                    else:
-                        flash("Incorrect Password!", "danger")
-            else:
-                flash("Student Account Not Found!", "danger")
-            return render_template("index.html")
+            return password_login("Student", studentID, studentPass, "/student")
 
         # student registration
         if username and mailID and Pass and conform:
@@ -666,7 +3412,7 @@ def login():
                 flash("Conform Password Doesn't Match!", "danger")
                 return render_template("index.html")
             else:
-                hashPass = generate_password_hash(Pass)
+                hashPass = hash_password(Pass)
                 execute_query(
                     "INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, ?);", 
                     [username, mailID, hashPass, "Student"]
@@ -676,31 +3422,7 @@ def login():
                 
         # worker login
         if workerID and workerPass:
-            user = execute_query("SELECT * FROM users WHERE email = ? AND role = 'Worker';", [workerID], fetch=True)
-            if user:
-                try:
-                    if check_password_hash(user["password"], workerPass):
-                        session["username"] = user["username"]
-                        session["user_id"] = user["id"]
-                        session["role"] = user["role"]
-                        return redirect("/worker")
-                    else:
-                        flash("Incorrect Password!", "danger")
-                except ValueError:
-                    # Handle legacy password format
-                    if check_legacy_password(user["password"], workerPass):
-                        # Rehash with current method
-                        hashed = generate_password_hash(workerPass)
-                        execute_query("UPDATE users SET password = ? WHERE id = ?;", [hashed, user["id"]])
-                        session["username"] = user["username"]
-                        session["user_id"] = user["id"]
-                        session["role"] = user["role"]
-                        return redirect("/worker")
-                    else:
-                        flash("Incorrect Password!", "danger")
-            else:
-                flash("Worker Account Not Found!", "danger")
-            return render_template("index.html")
+            return password_login("Worker", workerID, workerPass, "/worker")
 
     return render_template("index.html")
 
@@ -738,7 +3460,7 @@ def handle_forgot_password(request, role):
     
     if user:
         # Update password directly in users table
-        hashed_password = generate_password_hash(new_password)
+        hashed_password = hash_password(new_password)
         execute_query(
             "UPDATE users SET password = ? WHERE email = ? AND role = ?;",
             [hashed_password, email, role]
@@ -772,40 +3494,45 @@ def student():
             # Check if file is selected and has a filename
             if file and file.filename != '':
                 if allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    # Create unique filename to avoid conflicts
-                    unique_filename = f"{studentID}_{int(time.time())}_{filename}"
-                    file.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
-                    image_path = unique_filename
+                    image_path = save_upload(file)
                 else:
                     flash("Invalid file type. Please upload PNG, JPG, JPEG, or GIF images.", "danger")
                     return redirect("/student")
 
         if title and location and priority and description:
-            execute_query(
-                "INSERT INTO requests (studentID, title, location, status, priority, description, date, image_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?);", 
-                [studentID, title, location, "Pending", priority, description, today.strftime("%Y-%m-%d"), image_path]
-            )
+            with db_transaction() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO requests (studentID, title, location, status, priority, description, date, image_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?);", 
+                    [studentID, title, location, "Pending", priority, description, today.strftime("%Y-%m-%d"), image_path]
+                )
+                record_request_event(cursor.lastrowid, 'created', "Pending")
+            if image_path:
+                wake_job('image_derivatives')
             flash("Request submitted successfully!", "success")
     
     studentID = session["user_id"]
+    etag, not_modified = conditional_page(f"student:{studentID}")
+    if not_modified:
+        return not_modified
+    
     # Updated query to show new requests first
     datas = execute_query("SELECT * FROM requests WHERE studentID = ? ORDER BY date DESC;", [studentID], fetchall=True)
     
     # Convert Row objects to dictionaries for JSON serialization
     datas_dict = rows_to_dict(datas)
-    total_requests = len(datas_dict)
-    pending_count = sum(1 for r in datas_dict if r["status"] == "Pending")
-    in_progress_count = sum(1 for r in datas_dict if r["status"] == "In Progress")
-    resolved_count = sum(1 for r in datas_dict if r["status"] == "Completed")
+    counts = status_counts('student', studentID)
+    total_requests = sum(counts.values())
+    pending_count = counts.get("Pending", 0)
+    in_progress_count = counts.get("In Progress", 0)
+    resolved_count = counts.get("Completed", 0)
     
-    return render_template("student.html", 
+    return with_etag(render_template("student.html", 
                            name=session["username"], 
                            requests=datas_dict, 
                            total_requests=total_requests, 
                            pending_count=pending_count,
                            in_progress_count=in_progress_count,
-                           resolved_count=resolved_count)
+                           resolved_count=resolved_count), etag)
 
 # Lost & Found page
 @app.route("/lost-found", methods=["GET", "POST"])
@@ -828,54 +3555,52 @@ def lost_found():
             file = request.files['image']
             if file and file.filename != '':
                 if allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    unique_filename = f"lost_found_{studentID}_{int(time.time())}_{filename}"
-                    file.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
-                    image_path = unique_filename
+                    image_path = save_upload(file)
                 else:
                     flash("Invalid file type. Please upload PNG, JPG, JPEG, or GIF images.", "danger")
                     return redirect("/lost-found")
 
         if item_name and description and location_found and contact_info:
-            execute_query(
-                "INSERT INTO lost_items (studentID, item_name, description, location_found, date_found, image_path, contact_info) VALUES (?, ?, ?, ?, ?, ?, ?);", 
-                [studentID, item_name, description, location_found, today.strftime("%Y-%m-%d"), image_path, contact_info]
-            )
+            # Render the announcement once for all students
+            email_content = f"""
+            <h3>New Lost Item Reported</h3>
+            <p>A new lost item has been reported on CampusCare:</p>
+            <p><strong>Item:</strong> {item_name}</p>
+            <p><strong>Description:</strong> {description}</p>
+            <p><strong>Found at:</strong> {location_found}</p>
+            <p><strong>Date Found:</strong> {today.strftime('%Y-%m-%d')}</p>
+            <p><strong>Contact Reporter:</strong> {contact_info}</p>
+            <br>
+            <p>If this is your item, please contact the reporter using the provided contact information to claim it.</p>
+            <p>Login to CampusCare for more details: <a href="/lost-found">Lost & Found</a></p>
+            """
             
-            # Send notification to all students
-            students = execute_query("SELECT email FROM users WHERE role = 'Student';", fetchall=True)
-            if students:
-                for student in students:
-                    email_content = f"""
-                    <h3>New Lost Item Reported</h3>
-                    <p>A new lost item has been reported on CampusCare:</p>
-                    <p><strong>Item:</strong> {item_name}</p>
-                    <p><strong>Description:</strong> {description}</p>
-                    <p><strong>Found at:</strong> {location_found}</p>
-                    <p><strong>Date Found:</strong> {today.strftime('%Y-%m-%d')}</p>
-                    <p><strong>Contact Reporter:</strong> {contact_info}</p>
-                    <br>
-                    <p>If this is your item, please contact the reporter using the provided contact information to claim it.</p>
-                    <p>Login to CampusCare for more details: <a href="/lost-found">Lost & Found</a></p>
-                    """
-                    
-                    # Store notification in database
-                    student_info = execute_query("SELECT id FROM users WHERE email = ?;", [student['email']], fetch=True)
-                    if student_info:
-                        execute_query(
-                            "INSERT INTO email_notifications (recipient_id, subject, message, sent_date) VALUES (?, ?, ?, ?);",
-                            [student_info['id'], f"CampusCare: New Lost Item - {item_name}", email_content, today.strftime("%Y-%m-%d")]
-                        )
-                    
-                    # Send actual email
-                    send_email(student['email'], f"CampusCare: New Lost Item - {item_name}", email_content)
+            with db_transaction() as conn:
+                item_id = conn.execute(
+                    "INSERT INTO lost_items (studentID, item_name, description, location_found, date_found, image_path, contact_info) VALUES (?, ?, ?, ?, ?, ?, ?);", 
+                    [studentID, item_name, description, location_found, today.strftime("%Y-%m-%d"), image_path, contact_info]
+                ).lastrowid
+                
+                # Queue notification to all students
+                broadcast_id = create_broadcast(f"CampusCare: New Lost Item - {item_name}", email_content)
+                publish_event("lost_item", ["students"], id=item_id, item_name=item_name,
+                              location_found=location_found, date_found=today.strftime("%Y-%m-%d"))
+            
+            start_broadcast(broadcast_id)
+            live_events.wake()
+            if image_path:
+                wake_job('image_derivatives')
             
-            flash("Lost item reported successfully! All students have been notified.", "success")
+            flash("Lost item reported successfully! All students are being notified.", "success")
             return redirect("/lost-found")
         else:
             flash("Please fill in all required fields.", "danger")
             return redirect("/lost-found")
     
+    etag, not_modified = conditional_page("lost_found")
+    if not_modified:
+        return not_modified
+    
     # Get all lost items with reporter information
     lost_items = execute_query("""
         SELECT lost_items.*, 
@@ -888,10 +3613,10 @@ def lost_found():
     
     lost_items_dict = rows_to_dict(lost_items) if lost_items else []
     
-    return render_template("lost_found.html", 
+    return with_etag(render_template("lost_found.html", 
                            name=session["username"], 
                            user_id=session["user_id"],
-                           lost_items=lost_items_dict)
+                           lost_items=lost_items_dict), etag)
 
 # The /claim-item route is now obsolete. The claiming process is handled offline.
 @app.route("/claim-item/<int:item_id>", methods=["POST"])
@@ -957,20 +3682,91 @@ def email_notifications():
         flash("Access denied. Please login as an administrator.", "danger")
         return redirect("/")
     
-    # Get all email notifications with recipient names
-    notifications = execute_query("""
-        SELECT en.*, u.username as recipient_name, r.title as request_title
-        FROM email_notifications en
-        LEFT JOIN users u ON en.recipient_id = u.id
-        LEFT JOIN requests r ON en.request_id = r.id
-        ORDER BY en.sent_date DESC, en.id DESC;
-    """, fetchall=True)
-    
-    notifications_dict = rows_to_dict(notifications) if notifications else []
+    # One page of notifications with recipient names; bodies are fetched when a row is opened
+    select, date_column, id_column, _ = API_LISTS['notifications']
+    notifications, next_cursor = fetch_keyset_page(
+        select, [], [], date_column, id_column,
+        cursor=request.args.get("cursor"),
+        limit=app.config['ADMIN_PAGE_SIZE']
+    )
     
     return render_template("email_notifications.html", 
                            name=session["username"], 
-                           notifications=notifications_dict)
+                           notifications=notifications,
+                           next_cursor=next_cursor,
+                           first_page=not request.args.get("cursor"))
+
+# Body of one notification (live or archived)
+@app.route("/email-notifications/<int:notification_id>/body")
+def email_notification_body(notification_id):
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    
+    row = execute_query("""
+        SELECT body_hash, message FROM email_notifications WHERE id = ?
+        UNION ALL
+        SELECT body_hash, message FROM email_notifications_archive WHERE id = ?;
+    """, [notification_id, notification_id], fetch=True)
+    if not row:
+        return jsonify({"error": "Notification not found"}), 404
+    body = load_email_body(row['body_hash']) if row['body_hash'] else row['message']
+    return jsonify({"id": notification_id, "body": body or ""})
+
+# Broadcast progress
+@app.route("/broadcasts/<int:broadcast_id>")
+def broadcast_status(broadcast_id):
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    
+    progress = broadcast_progress(broadcast_id)
+    if not progress:
+        return jsonify({"error": "Broadcast not found"}), 404
+    return jsonify(progress)
+
+# Slow queries grouped by statement, costliest first
+@app.route("/admin/slow-queries")
+def slow_queries():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        flash("Access denied. Please login as an administrator.", "danger")
+        return redirect("/")
+    
+    summary, entry_count = slow_query_summary()
+    if request.args.get("format") == "json":
+        return jsonify({"queries": summary, "entries": entry_count})
+    return render_template("admin_slow_queries.html", queries=summary, entry_count=entry_count,
+                           threshold_ms=app.config['SLOW_QUERY_THRESHOLD_MS'])
+
+# SLA analytics, read from the rollups only
+@app.route("/admin/analytics")
+def admin_analytics():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        flash("Access denied. Please login as an administrator.", "danger")
+        return redirect("/")
+    
+    days = request.args.get("days", "30")
+    days = min(int(days), 366) if days.isdigit() and int(days) > 0 else 30
+    dashboard = sla_dashboard(days)
+    if request.args.get("format") == "json":
+        return jsonify(dashboard)
+    return render_template("admin_analytics.html", sla_metrics=SLA_METRICS, **dashboard)
+
+@app.template_filter("duration")
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    if seconds < 86400:
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+
+# Password hashing pool metrics
+@app.route("/admin/password-hashing")
+def password_hashing_stats():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    return jsonify(password_hasher.stats())
 
 # admin page
 @app.route("/admin", methods=["GET","POST"])
@@ -979,25 +3775,11 @@ def admin():
         flash("Access denied. Please login as an administrator.", "danger")
         return redirect("/")
     
-    # Get all requests with student names, ordered by date
-    all_requests = execute_query("""
-        SELECT requests.*, users.username as student_name 
-        FROM requests 
-        LEFT JOIN users ON requests.studentID = users.id 
-        ORDER BY requests.date DESC;
-    """, fetchall=True)
-    
-    # Convert Row objects to dictionaries
-    all_requests_dict = rows_to_dict(all_requests) if all_requests else []
+    # Only the first page is rendered; the rest is fetched from /admin/requests
+    first_page, next_cursor = fetch_admin_requests(limit=app.config['ADMIN_PAGE_SIZE'])
     
     # Get all workers with their assigned request count
-    workers = execute_query("""
-        SELECT u.*, COUNT(r.id) as assigned_requests 
-        FROM users u 
-        LEFT JOIN requests r ON u.id = r.workerID AND r.status != 'Completed'
-        WHERE u.role = 'Worker' 
-        GROUP BY u.id;
-    """, fetchall=True)
+    workers = execute_query(WORKER_ROSTER_QUERY.format(department_filter=""), fetchall=True)
     
     workers_dict = rows_to_dict(workers) if workers else []
     
@@ -1006,34 +3788,657 @@ def admin():
     departments_dict = [d['department'] for d in rows_to_dict(departments)] if departments else []
     
     # Calculate statistics
-    total_requests = len(all_requests_dict)
-    pending_count = sum(1 for r in all_requests_dict if r["status"] == "Pending")
-    in_progress_count = sum(1 for r in all_requests_dict if r["status"] == "In Progress")
-    resolved_count = sum(1 for r in all_requests_dict if r["status"] == "Completed")
+    counts = status_counts('global')
+    archived_count = sum(status_counts('archived').values())
+    total_requests = sum(counts.values()) + archived_count
+    pending_count = counts.get("Pending", 0)
+    in_progress_count = counts.get("In Progress", 0)
+    resolved_count = counts.get("Completed", 0) + archived_count
     
     return render_template("admin.html", 
                            name=session["username"], 
-                           all_requests=all_requests_dict,
+                           all_requests=first_page,
+                           next_cursor=next_cursor,
                            workers=workers_dict,
                            departments=departments_dict,
                            total_requests=total_requests,
                            pending_count=pending_count,
                            in_progress_count=in_progress_count,
-                           resolved_count=resolved_count)
+                           resolved_count=resolved_count,
+                           archived_count=archived_count,
+                           archive_after_days=app.config['ARCHIVE_AFTER_DAYS'])
+
+# Admin request listing API (JSON, or rendered rows with format=html)
+@app.route("/admin/requests")
+def admin_requests():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    
+    rows, next_cursor = fetch_admin_requests(
+        status=request.args.get("status") or None,
+        priority=request.args.get("priority") or None,
+        department=request.args.get("department") or None,
+        search=(request.args.get("q") or "").strip() or None,
+        cursor=request.args.get("cursor"),
+        limit=parse_limit(request.args.get("limit"), app.config['ADMIN_PAGE_SIZE'])
+    )
+    
+    if request.args.get("format") == "html":
+        departments = execute_query("SELECT DISTINCT department FROM users WHERE department IS NOT NULL;", fetchall=True)
+        departments = [d['department'] for d in departments]
+        return jsonify({
+            "rows_html": get_template_attribute("admin_requests.html", "request_rows")(rows),
+            "modals_html": get_template_attribute("admin_requests.html", "request_modals")(rows, departments),
+            "next_cursor": next_cursor
+        })
+    
+    return jsonify({"requests": rows, "next_cursor": next_cursor})
+
+# Archived requests for the admin page, one page at a time (rendered rows)
+@app.route("/admin/archive")
+def admin_archive():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    
+    select, date_column, id_column, _ = API_LISTS['archived_requests']
+    conditions, params = [], []
+    search = request.args.get("q", "").strip()
+    match = fts_query(search)
+    if match:
+        conditions.append("""(ra.id IN (SELECT rowid FROM requests_archive_fts WHERE requests_archive_fts MATCH ?)
+            OR ra.studentID IN (SELECT id FROM users WHERE role = 'Student' AND username LIKE ?))""")
+        params.extend([match, f"%{search}%"])
+    rows, next_cursor = fetch_keyset_page(
+        select, conditions, params, date_column, id_column,
+        cursor=request.args.get("cursor"),
+        limit=parse_limit(request.args.get("limit"), app.config['ADMIN_PAGE_SIZE'])
+    )
+    return jsonify({
+        "rows_html": get_template_attribute("admin_requests.html", "archived_request_rows")(rows),
+        "next_cursor": next_cursor
+    })
+
+# Data export
+# /admin/export/<dataset> streams every row of a dataset in a date range, live
+# and archived, as CSV or NDJSON, optionally gzipped. The rows come from a
+# dedicated connection inside one read transaction: the export sees a single
+# WAL snapshot while writers carry on. Rows are fetched, encoded and sent a
+# batch at a time, so memory stays flat however many rows there are. Both
+# halves of the UNION are read in (date, id) index order and merged without a
+# sort.
+EXPORT_BATCH_SIZE = 500
+EXPORT_QUERIES = {
+    # dataset: (select for one table, live table, archive table, its archived_at column, order by: date, id)
+    'requests': ("""
+        SELECT r.id, r.date, r.title, r.description, r.location, r.priority, r.status, r.department,
+               r.studentID as student_id, s.username as student_name, s.email as student_email,
+               r.workerID as worker_id, w.username as worker_name, w.email as worker_email,
+               r.notes, r.worker_notes, {archived_at} as archived_at
+        FROM {table} r
+        LEFT JOIN users s ON r.studentID = s.id
+        LEFT JOIN users w ON r.workerID = w.id
+        WHERE r.date >= ? AND r.date < ?
+    """, 'requests', 'requests_archive', "r.archived_at", "2, 1"),
+    'notifications': ("""
+        SELECT n.id, n.sent_date, n.request_id, n.recipient_id, u.username as recipient_name,
+               u.email as recipient_email, n.subject, n.status, n.broadcast_id, n.body_hash,
+               {archived_at} as archived_at
+        FROM {table} n
+        LEFT JOIN users u ON n.recipient_id = u.id
+        WHERE n.sent_date >= ? AND n.sent_date < ?
+    """, 'email_notifications', 'email_notifications_archive', "n.archived_at", "2, 1"),
+}
+
+def export_query(dataset):
+    select, live, archive, archived_at, order_by = EXPORT_QUERIES[dataset]
+    return (select.format(table=live, archived_at="NULL") + " UNION ALL " +
+            select.format(table=archive, archived_at=archived_at) + f" ORDER BY {order_by};")
+
+def export_rows(dataset, start, end):
+    """Yield the column names, then batches of rows, all from one read snapshot"""
+    conn = open_db_connection()
+    try:
+        conn.execute("BEGIN;")  # the first read below pins the snapshot until the export ends
+        # A plain cursor keeps the long-running read out of the slow query log
+        cursor = sqlite3.Cursor(conn)
+        cursor.execute(export_query(dataset), [start, end, start, end])
+        yield [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def export_chunks(batches, fmt):
+    """Encode the batches from export_rows as CSV or NDJSON, one chunk of bytes per batch"""
+    columns = next(batches)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(columns)
+    for rows in batches:
+        if fmt == 'csv':
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(dict(zip(columns, row))) + "\n")
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # the CSV header of an empty export
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(app.config['COMPRESS_GZIP_LEVEL'], zlib.DEFLATED, 31)  # 31: gzip framing
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+# Stream requests or notifications, live and archived, for audits
+@app.route("/admin/export/<dataset>")
+def admin_export(dataset):
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    if dataset not in EXPORT_QUERIES:
+        return jsonify({"error": "Unknown export"}), 404
+    
+    fmt = request.args.get("format", "csv")
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "Format must be csv or ndjson"}), 400
+    try:
+        start = datetime.strptime(request.args["from"], "%Y-%m-%d").date().isoformat() if request.args.get("from") else ""
+        end = (datetime.strptime(request.args["to"], "%Y-%m-%d").date() + timedelta(days=1)).isoformat() if request.args.get("to") else "9999"
+    except ValueError:
+        return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+    
+    chunks = export_chunks(export_rows(dataset, start, end), fmt)
+    filename = f"{dataset}-{date.today().isoformat()}.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    if request.args.get("gzip") == "1":
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        mimetype = 'application/gzip'
+    
+    print(f"📤 Exporting {dataset} ({fmt}) from {start or 'the start'} to {end} for {session['username']}")
+    return app.response_class(chunks, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no',
+    })
+
+# Full-text search over requests and lost items
+@app.route("/search")
+def search():
+    if 'user_id' not in session:
+        return jsonify({"error": "Access denied"}), 403
+    
+    kind = request.args.get("type", "requests")
+    if kind not in FTS_COLUMNS:
+        return jsonify({"error": "Unknown search type"}), 400
+    
+    results, next_cursor = search_index(
+        kind,
+        request.args.get("q", ""),
+        session.get("role"),
+        session["user_id"],
+        cursor=request.args.get("cursor"),
+        limit=parse_limit(request.args.get("limit"), SEARCH_PAGE_SIZE, maximum=100)
+    )
+    return jsonify({"results": results, "next_cursor": next_cursor})
+
+# JSON API (v1)
+# Read-only lists for the mobile app and kiosk displays. Every list is paged
+# newest first with an opaque cursor over an indexed (date, id) key, accepts
+# the filters named in API_LISTS, and returns only the columns named in
+# ?fields=a,b,c when given.
+API_LISTS = {
+    # name: (select with {where}, date column, id column, {filter argument: column})
+    'requests': ("""
+        SELECT requests.*, workers.username as worker_name
+        FROM requests
+        LEFT JOIN users as workers ON requests.workerID = workers.id
+        {where}
+    """, "requests.date", "requests.id", {'status': "requests.status", 'priority': "requests.priority"}),
+    'tasks': ("""
+        SELECT requests.*, users.username as student_name
+        FROM requests
+        LEFT JOIN users ON requests.studentID = users.id
+        {where}
+    """, "requests.date", "requests.id", {'status': "requests.status", 'priority': "requests.priority"}),
+    'lost_items': ("""
+        SELECT lost_items.*, reporter.username as reported_by
+        FROM lost_items
+        LEFT JOIN users as reporter ON lost_items.studentID = reporter.id
+        {where}
+    """, "lost_items.date_found", "lost_items.id", {'status': "lost_items.status"}),
+    'notifications': ("""
+        SELECT en.*, u.username as recipient_name, r.title as request_title
+        FROM email_notifications en
+        LEFT JOIN users u ON en.recipient_id = u.id
+        LEFT JOIN requests r ON en.request_id = r.id
+        {where}
+    """, "en.sent_date", "en.id", {'status': "en.status", 'request_id': "en.request_id", 'recipient_id': "en.recipient_id"}),
+    'archived_requests': ("""
+        SELECT ra.*, users.username as student_name, workers.username as worker_name
+        FROM requests_archive ra
+        LEFT JOIN users ON ra.studentID = users.id
+        LEFT JOIN users as workers ON ra.workerID = workers.id
+        {where}
+    """, "ra.date", "ra.id", {'department': "ra.department", 'priority': "ra.priority", 'student_id': "ra.studentID"}),
+    'archived_notifications': ("""
+        SELECT ena.*, u.username as recipient_name
+        FROM email_notifications_archive ena
+        LEFT JOIN users u ON ena.recipient_id = u.id
+        {where}
+    """, "ena.sent_date", "ena.id", {'request_id': "ena.request_id", 'recipient_id': "ena.recipient_id"}),
+}
+API_PAGE_SIZE = 50
+
+def api_fields():
+    """Column names requested with ?fields=, or None for all columns"""
+    fields = [field.strip() for field in request.args.get("fields", "").split(",") if field.strip()]
+    return fields or None
+
+def select_fields(rows, fields):
+    """Keep only the requested columns; returns None if a column does not exist"""
+    if not fields or not rows:
+        return rows
+    if any(field not in rows[0] for field in fields):
+        return None
+    return [{field: row[field] for field in fields} for row in rows]
+
+def api_page(name, rows, next_cursor):
+    rows = select_fields(rows, api_fields())
+    if rows is None:
+        return jsonify({"error": "Unknown field in fields"}), 400
+    return jsonify({name: rows, "next_cursor": next_cursor})
+
+def api_list(name, conditions=(), params=()):
+    """One page of an API_LISTS list, restricted by the caller's conditions"""
+    select, date_column, id_column, filters = API_LISTS[name]
+    conditions = list(conditions)
+    params = list(params)
+    for argument, column in filters.items():
+        value = request.args.get(argument)
+        if value:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    
+    rows, next_cursor = fetch_keyset_page(
+        select, conditions, params, date_column, id_column,
+        cursor=request.args.get("cursor"),
+        limit=parse_limit(request.args.get("limit"), API_PAGE_SIZE)
+    )
+    return api_page(name, rows, next_cursor)
+
+# A student's own requests
+@app.route("/api/v1/requests")
+def api_student_requests():
+    if 'user_id' not in session or session.get('role') != 'Student':
+        return jsonify({"error": "Access denied"}), 403
+    return api_list('requests', ["requests.studentID = ?"], [session["user_id"]])
+
+# Requests assigned to the logged-in worker
+@app.route("/api/v1/tasks")
+def api_worker_tasks():
+    if 'user_id' not in session or session.get('role') != 'Worker':
+        return jsonify({"error": "Access denied"}), 403
+    return api_list('tasks', ["requests.workerID = ?"], [session["user_id"]])
+
+# Every request, with the admin table's filters and search
+@app.route("/api/v1/admin/requests")
+def api_admin_requests():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    rows, next_cursor = fetch_admin_requests(
+        status=request.args.get("status") or None,
+        priority=request.args.get("priority") or None,
+        department=request.args.get("department") or None,
+        search=(request.args.get("q") or "").strip() or None,
+        cursor=request.args.get("cursor"),
+        limit=parse_limit(request.args.get("limit"), API_PAGE_SIZE)
+    )
+    return api_page('requests', rows, next_cursor)
+
+# Lost & Found board
+@app.route("/api/v1/lost-items")
+def api_lost_items():
+    if 'user_id' not in session or session.get('role') not in ('Student', 'Admin'):
+        return jsonify({"error": "Access denied"}), 403
+    return api_list('lost_items')
+
+# Email notification log
+@app.route("/api/v1/notifications")
+def api_notifications():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    return api_list('notifications')
+
+# Archived requests and their notifications
+@app.route("/api/v1/admin/archived-requests")
+def api_archived_requests():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    return api_list('archived_requests')
+
+@app.route("/api/v1/admin/archived-notifications")
+def api_archived_notifications():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    return api_list('archived_notifications')
 
 # Get workers by department
 @app.route("/get-workers-by-department/<department>")
 def get_workers_by_department(department):
-    workers = execute_query("""
-        SELECT u.*, COUNT(r.id) as assigned_requests 
-        FROM users u 
-        LEFT JOIN requests r ON u.id = r.workerID AND r.status != 'Completed'
-        WHERE u.role = 'Worker' AND u.department = ?
-        GROUP BY u.id;
-    """, [department], fetchall=True)
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    return jsonify({"workers": worker_roster.department(department)})
+
+# Request events and SLA rollups
+# Every creation, assignment and status change of a request is appended to
+# request_events with its exact time (triggers reject updates and deletes).
+# The first assignment and the first completion of a request also carry their
+# duration since creation as an SLA sample. A scheduler job folds new samples
+# into sla_rollups: count, median and p90 per day for all requests, each
+# department and each worker. It re-aggregates only the days and groups the
+# new events touched, and the analytics page reads nothing but the rollups.
+SLA_METRICS = {'assign': "Time to assign", 'complete': "Time to complete"}
+SLA_SCOPES = {'all': None, 'department': 'department', 'worker': 'worker_id'}
+SLA_ROLLUP_BATCH_SIZE = 1000
+
+def record_request_event(request_id, event, status=None, worker_id=None, department=None):
+    """Append an event for a request; call inside db_transaction()"""
+    conn = get_db_connection()
+    now = time.time()
+    metric = 'assign' if event == 'assigned' else 'complete' if event == 'status' and status == 'Completed' else None
+    seconds = None
+    if metric:
+        history = conn.execute(
+            "SELECT MIN(CASE WHEN event = 'created' THEN at END) as created_at, MAX(metric = ?) as seen FROM request_events WHERE request_id = ?;",
+            [metric, request_id]
+        ).fetchone()
+        # Only the first sample counts, and requests older than the log have no start time
+        if history['created_at'] is not None and not history['seen']:
+            seconds = now - history['created_at']
+        else:
+            metric = None
+    conn.execute("""
+        INSERT INTO request_events (request_id, event, status, worker_id, department, actor_id, at, day, metric, seconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+    """, [request_id, event, status, int(worker_id) if worker_id not in (None, '', 'null') else None, department,
+          session.get('user_id') if has_request_context() else None,
+          now, datetime.fromtimestamp(now).strftime("%Y-%m-%d"), metric, seconds])
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+@single_flight(minutes=1)
+@timed_job
+def update_sla_rollups():
+    """Refresh the daily rollups touched by events recorded since the last run"""
+    job = 'update_sla_rollups'
+    with app.app_context():
+        conn = get_db_connection()
+        refreshed = 0
+        while True:
+            events = conn.execute(
+                "SELECT id, day, metric, department, worker_id FROM request_events WHERE id > ? ORDER BY id LIMIT ?;",
+                [job_high_water(job), SLA_ROLLUP_BATCH_SIZE]
+            ).fetchall()
+            if not events:
+                break
+            groups = set()
+            for event in events:
+                if event['metric']:
+                    for scope, column in SLA_SCOPES.items():
+                        scope_id = event[column] if column else ''
+                        if scope_id is not None:
+                            groups.add((event['metric'], scope, event['day'], scope_id))
+            
+            with db_transaction():
+                for metric, scope, day, scope_id in groups:
+                    column = SLA_SCOPES[scope]
+                    condition, params = (f"AND {column} = ?", [metric, day, scope_id]) if column else ("", [metric, day])
+                    seconds = [row[0] for row in conn.execute(
+                        f"SELECT seconds FROM request_events WHERE metric = ? AND day = ? {condition} ORDER BY seconds;", params
+                    )]
+                    conn.execute("""
+                        INSERT INTO sla_rollups (metric, scope, day, scope_id, count, p50_seconds, p90_seconds, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (metric, scope, day, scope_id) DO UPDATE SET
+                            count = excluded.count, p50_seconds = excluded.p50_seconds,
+                            p90_seconds = excluded.p90_seconds, updated_at = excluded.updated_at;
+                    """, [metric, scope, day, str(scope_id), len(seconds), percentile(seconds, 0.5), percentile(seconds, 0.9), time.time()])
+                set_job_high_water(job, events[-1]['id'])
+            refreshed += len(groups)
+            if len(events) < SLA_ROLLUP_BATCH_SIZE:
+                break
+        if refreshed:
+            print(f"📊 Refreshed {refreshed} SLA rollups")
+
+def sla_dashboard(days):
+    """The last days days of rollups: totals per metric, department and worker, and daily rows"""
+    since = (date.today() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    rows = execute_query("""
+        SELECT metric, scope, day, scope_id, count, p50_seconds, p90_seconds FROM sla_rollups
+        WHERE metric IN ('assign', 'complete') AND scope IN ('all', 'department', 'worker') AND day >= ?;
+    """, [since], fetchall=True)
     
-    workers_dict = rows_to_dict(workers) if workers else []
-    return jsonify({"workers": workers_dict})
+    # Percentiles cannot be merged exactly, so a range shows count-weighted daily values
+    totals, daily = {}, {}
+    for row in rows:
+        total = totals.setdefault((row['scope'], row['scope_id']), {}).setdefault(row['metric'], {'count': 0, 'p50': 0.0, 'p90': 0.0})
+        total['count'] += row['count']
+        total['p50'] += row['p50_seconds'] * row['count']
+        total['p90'] += row['p90_seconds'] * row['count']
+        if row['scope'] == 'all':
+            daily.setdefault(row['day'], {})[row['metric']] = {'count': row['count'], 'p50': row['p50_seconds'], 'p90': row['p90_seconds']}
+    for by_metric in totals.values():
+        for total in by_metric.values():
+            total['p50'] /= total['count']
+            total['p90'] /= total['count']
+    
+    worker_ids = [int(scope_id) for scope, scope_id in totals if scope == 'worker']
+    names = dict(execute_query(
+        f"SELECT id, username FROM users WHERE id IN ({', '.join('?' for _ in worker_ids)});", worker_ids, fetchall=True
+    )) if worker_ids else {}
+    return {
+        'days': days,
+        'overall': totals.get(('all', ''), {}),
+        'departments': sorted(({'department': scope_id, **by_metric} for (scope, scope_id), by_metric in totals.items()
+                               if scope == 'department'), key=lambda row: row['department']),
+        'workers': sorted(({'worker_id': int(scope_id), 'name': names.get(int(scope_id), f"Worker #{scope_id}"), **by_metric}
+                           for (scope, scope_id), by_metric in totals.items() if scope == 'worker'), key=lambda row: row['name']),
+        'daily': [{'day': day, **daily[day]} for day in sorted(daily, reverse=True)],
+    }
+
+# Worker roster cache
+# The assign modal asks for a department's workers every time one is picked.
+# Each process keeps the roster (id, name, department, status and open task
+# count of every worker) in memory, indexed by department. Code that changes a
+# worker or their open tasks calls roster_changed() at the end of its
+# transaction: that bumps the 'roster' change version and, once the transaction
+# has committed, reloads just those workers, provided this process was up to
+# date. Other processes see the new
+# version on their next lookup and reload the whole roster.
+ROSTER_FIELDS = ('id', 'username', 'department', 'status', 'assigned_requests')
+
+def roster_version(conn):
+    row = conn.execute("SELECT version FROM change_versions WHERE scope = 'roster';").fetchone()
+    return row['version'] if row else 0
+
+class WorkerRoster:
+    """Process-local worker roster by department, kept in step with the 'roster' change version"""
+
+    def __init__(self):
+        self.version = None
+        self._departments = {}  # department -> {worker id: worker}
+        self._lock = threading.Lock()
+
+    def _load(self, conn, worker_ids=None):
+        department_filter = f"AND u.id IN ({', '.join('?' for _ in worker_ids)})" if worker_ids is not None else ""
+        rows = conn.execute(WORKER_ROSTER_QUERY.format(department_filter=department_filter), list(worker_ids or []))
+        return [{field: row[field] for field in ROSTER_FIELDS} for row in rows]
+
+    def _index(self, worker):
+        self._departments.setdefault(worker['department'], {})[worker['id']] = worker
+
+    def department(self, department):
+        """Workers of a department ordered by id, reloading the roster first if it changed"""
+        conn = get_db_connection()
+        version = roster_version(conn)  # read before the rows, so a racing change forces another reload
+        with self._lock:
+            hit = version == self.version
+            if not hit:
+                self._departments = {}
+                for worker in self._load(conn):
+                    self._index(worker)
+                self.version = version
+            workers = [dict(worker) for worker in self._departments.get(department, {}).values()]
+        metrics.inc('campuscare_roster_cache_lookups_total', {'result': 'hit' if hit else 'miss'})
+        return sorted(workers, key=lambda worker: worker['id'])
+
+    def changed(self, conn, worker_ids, version):
+        """Reload worker_ids after this process committed the move of the roster to version"""
+        with self._lock:
+            if self.version == version:  # a lookup already reloaded the committed roster
+                return
+            if self.version != version - 1:
+                self.version = None  # missed someone else's change; reload on the next lookup
+                return
+            for workers in self._departments.values():
+                for worker_id in worker_ids:
+                    workers.pop(worker_id, None)
+            for worker in self._load(conn, worker_ids):
+                self._index(worker)
+            self.version = version
+
+worker_roster = WorkerRoster()
+
+def roster_changed(worker_ids):
+    """Publish a change to these workers' roster entries; call last inside db_transaction()"""
+    worker_ids = {int(worker_id) for worker_id in worker_ids if worker_id not in (None, '', 'null')}
+    if not worker_ids:
+        return
+    conn = get_db_connection()
+    conn.execute(version_bump("'roster'"))
+    version = roster_version(conn)
+    on_commit(lambda: worker_roster.changed(get_db_connection(), worker_ids, version))
+
+# Request assignment
+# assign_requests applies a list of assignments in one transaction: the request
+# rows, the workers' status, the live events and one batch of status emails.
+# The admin form assigns a single request through it. The bulk API can leave
+# the worker to be picked: the Available worker of the department with the
+# fewest open tasks, counting the tasks handed out earlier in the same batch.
+REQUEST_STATUSES = ('Pending', 'In Progress', 'Completed')
+AUTO_ASSIGN = 'auto'
+BULK_ASSIGN_LIMIT = 500
+
+def assign_requests(assignments):
+    """
+    Apply assignments (dicts with request_id, worker_id, department, status and
+    notes) in one transaction. worker_id may be AUTO_ASSIGN; the department then
+    defaults to the request's own. Returns one outcome dict per assignment.
+    """
+    conn = get_db_connection()
+    results, changed, assigned_workers, roster_ids = [], [], set(), set()
+    with db_transaction():
+        ids = [str(assignment['request_id']) for assignment in assignments]
+        placeholders = ", ".join("?" for _ in ids)
+        current = {str(row['id']): row for row in conn.execute(
+            f"SELECT id, status, studentID, workerID, department, title, priority, location FROM requests WHERE id IN ({placeholders});", ids
+        )}
+        explicit = {str(assignment['worker_id']) for assignment in assignments
+                    if assignment['worker_id'] not in (None, '', 'null', AUTO_ASSIGN)}
+        workers = {str(row['id']): row['department'] for row in conn.execute(
+            f"SELECT id, department FROM users WHERE role = 'Worker' AND id IN ({', '.join('?' for _ in explicit)});", list(explicit)
+        )} if explicit else {}
+
+        # Least-loaded first: one heap of [open tasks, worker id] per department
+        queues = {}
+        if any(assignment['worker_id'] == AUTO_ASSIGN for assignment in assignments):
+            for row in conn.execute(WORKER_ROSTER_QUERY.format(department_filter="AND u.status = 'Available'")):
+                queues.setdefault(row['department'], []).append([row['assigned_requests'], row['id']])
+            for heap in queues.values():
+                heapq.heapify(heap)
+
+        for assignment in assignments:
+            request_id, worker_id, status = str(assignment['request_id']), assignment['worker_id'], assignment['status']
+            current_request = current.get(request_id)
+            if current_request is None:
+                results.append({'request_id': assignment['request_id'], 'outcome': 'not_found'})
+                continue
+            department = assignment['department']
+            if worker_id == AUTO_ASSIGN:
+                department = department or current_request['department']
+                candidates = queues.get(department)
+                if not candidates:
+                    results.append({'request_id': assignment['request_id'], 'outcome': 'no_worker', 'department': department})
+                    continue
+                open_tasks, worker_id = candidates[0]
+                heapq.heapreplace(candidates, [open_tasks + 1, worker_id])
+            elif worker_id not in (None, '', 'null'):
+                if str(worker_id) not in workers:
+                    results.append({'request_id': assignment['request_id'], 'outcome': 'unknown_worker', 'worker_id': worker_id})
+                    continue
+                department = department or workers[str(worker_id)]
+
+            conn.execute(
+                "UPDATE requests SET workerID = ?, department = ?, status = ?, notes = ? WHERE id = ?;",
+                [worker_id, department, status, assignment['notes'], request_id]
+            )
+            
+            # If status changed and it's not the same as before, queue email
+            email_queued = current_request['status'] != status
+            if email_queued:
+                changed.append((request_id, status, assignment['notes']))
+            
+            assigned = bool(worker_id and worker_id != "null")
+            newly_assigned = assigned and str(current_request["workerID"]) != str(worker_id)
+            if newly_assigned:
+                record_request_event(current_request['id'], 'assigned', status, worker_id, department)
+            if email_queued:
+                record_request_event(current_request['id'], 'status', status, worker_id, department)
+            
+            # Push the change to the student's and worker's open pages
+            if assigned:
+                assigned_workers.add(worker_id)
+            roster_ids.update([worker_id, current_request["workerID"]])
+            if email_queued:
+                audiences = [f"student:{current_request['studentID']}"]
+                if assigned and not newly_assigned:
+                    audiences.append(f"worker:{worker_id}")
+                publish_event("request_status", audiences, id=current_request['id'], title=current_request["title"], status=status)
+            if newly_assigned:
+                publish_event("assignment", [f"worker:{worker_id}"], id=current_request['id'], title=current_request["title"],
+                              status=status, priority=current_request["priority"], location=current_request["location"])
+            results.append({'request_id': assignment['request_id'], 'outcome': 'assigned', 'worker_id': worker_id,
+                            'department': department, 'status': status, 'email_queued': email_queued})
+
+        # Update worker status to "Assigned"
+        if assigned_workers:
+            conn.executemany("UPDATE users SET status = 'Assigned' WHERE id = ?;", [(worker_id,) for worker_id in assigned_workers])
+        
+        if changed:
+            changed_ids = [request_id for request_id, _, _ in changed]
+            request_data = {str(row['id']): row for row in conn.execute(
+                STATUS_EMAIL_QUERY.format(placeholders=", ".join("?" for _ in changed_ids)), changed_ids
+            )}
+            queue_notification_batch([email for request_id, status, notes in changed
+                                      for email in status_update_emails(request_data[request_id], status, notes)])
+        
+        roster_changed(roster_ids)
+    
+    if changed:
+        wake_job('email_outbox')
+    live_events.wake()
+    return results
 
 # Add a new route for assigning requests
 @app.route("/assign-request", methods=["POST"])
@@ -1043,36 +4448,70 @@ def assign_request():
         return redirect("/")
     
     if request.method == "POST":
-        request_id = request.form.get("request_id")
-        worker_id = request.form.get("worker_id")
-        department = request.form.get("department")
-        status = request.form.get("status")
-        notes = request.form.get("notes")
-        
-        # Get current status before update
-        current_request = execute_query("SELECT status FROM requests WHERE id = ?;", [request_id], fetch=True)
-        current_status = current_request["status"] if current_request else None
-        
-        # Update the request with department and worker
-        execute_query(
-            "UPDATE requests SET workerID = ?, department = ?, status = ?, notes = ? WHERE id = ?;", 
-            [worker_id, department, status, notes, request_id]
-        )
-        
-        # If status changed and it's not the same as before, send email
-        if current_status and current_status != status:
-            send_status_update_email(request_id, status, notes)
+        result = assign_requests([{
+            'request_id': request.form.get("request_id"),
+            'worker_id': request.form.get("worker_id"),
+            'department': request.form.get("department"),
+            'status': request.form.get("status"),
+            'notes': request.form.get("notes"),
+        }])[0]
         
-        # Update worker status to "Assigned"
-        if worker_id and worker_id != "null":
-            execute_query(
-                "UPDATE users SET status = 'Assigned' WHERE id = ?;", 
-                [worker_id]
-            )
-        
-        flash("Request assigned successfully!", "success")
+        if result['outcome'] == 'assigned':
+            flash("Request assigned successfully!", "success")
+        elif result['outcome'] == 'not_found':
+            flash("Request not found.", "danger")
+        elif result['outcome'] == 'unknown_worker':
+            flash("The selected worker does not exist.", "danger")
+        elif result.get('department'):
+            flash(f"No available worker in {result['department']}.", "warning")
+        else:
+            flash("Choose a department before auto-assigning this request.", "warning")
         return redirect("/admin")
 
+# Assign many requests at once. The JSON body lists request_ids and/or
+# assignments ({request_id, worker_id, department, status, notes}); top-level
+# worker_id, department, status and notes are the defaults for each, and
+# "auto": true picks the least-loaded Available worker per department.
+@app.route("/api/v1/admin/assignments", methods=["POST"])
+def api_bulk_assign():
+    if 'user_id' not in session or session.get('role') != 'Admin':
+        return jsonify({"error": "Access denied"}), 403
+    
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    
+    defaults = {
+        'worker_id': AUTO_ASSIGN if payload.get('auto') else payload.get('worker_id'),
+        'department': payload.get('department'),
+        'status': payload.get('status') or 'In Progress',
+        'notes': payload.get('notes'),
+    }
+    items = [{'request_id': request_id} for request_id in payload.get('request_ids') or []]
+    items += payload.get('assignments') or []
+    if not items:
+        return jsonify({"error": "No requests given"}), 400
+    if len(items) > BULK_ASSIGN_LIMIT:
+        return jsonify({"error": f"At most {BULK_ASSIGN_LIMIT} requests per call"}), 400
+    
+    assignments, seen = [], set()
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('request_id'), int):
+            return jsonify({"error": "Each assignment needs an integer request_id"}), 400
+        if item['request_id'] in seen:
+            return jsonify({"error": f"Request {item['request_id']} is listed twice"}), 400
+        seen.add(item['request_id'])
+        assignment = {key: item.get(key, default) for key, default in defaults.items()}
+        assignment['request_id'] = item['request_id']
+        if assignment['status'] not in REQUEST_STATUSES:
+            return jsonify({"error": f"Invalid status for request {item['request_id']}"}), 400
+        assignments.append(assignment)
+    
+    results = assign_requests(assignments)
+    assigned = sum(result['outcome'] == 'assigned' for result in results)
+    print(f"📋 Bulk assignment: {assigned}/{len(results)} requests assigned")
+    return jsonify({"assigned": assigned, "results": results})
+
 # worker page
 @app.route("/worker", methods=["GET","POST"])
 def worker():
@@ -1082,6 +4521,10 @@ def worker():
     
     # Get the current worker's ID
     worker_id = session["user_id"]
+    etag, not_modified = conditional_page(f"worker:{worker_id}")
+    if not_modified:
+        return not_modified
+    
     # Get requests assigned to this worker with student names
     assigned_requests = execute_query("""
         SELECT requests.*, users.username as student_name 
@@ -1094,9 +4537,9 @@ def worker():
     # Convert Row objects to dictionaries
     assigned_requests_dict = rows_to_dict(assigned_requests) if assigned_requests else []
     
-    return render_template("worker.html", 
+    return with_etag(render_template("worker.html", 
                            name=session["username"], 
-                           assigned_requests=assigned_requests_dict)
+                           assigned_requests=assigned_requests_dict), etag)
 
 # Add a new route for updating requests with image upload
 @app.route("/update-request", methods=["POST"])
@@ -1117,43 +4560,54 @@ def update_request():
             # Check if file is selected and has a filename
             if file and file.filename != '':
                 if allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    # Create unique filename to avoid conflicts
-                    unique_filename = f"worker_{request_id}_{int(time.time())}_{filename}"
-                    file.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
-                    worker_image_path = unique_filename
+                    worker_image_path = save_upload(file)
                 else:
                     flash("Invalid file type. Please upload PNG, JPG, JPEG, or GIF images.", "danger")
                     return redirect("/worker")
         
-        # Get current status before update
-        current_request = execute_query("SELECT status FROM requests WHERE id = ?;", [request_id], fetch=True)
-        current_status = current_request["status"] if current_request else None
-        
-        # Update the request in the database with worker image
-        if worker_image_path:
-            execute_query(
-                "UPDATE requests SET status = ?, worker_notes = ?, worker_image_path = ? WHERE id = ?;", 
-                [status, worker_notes, worker_image_path, request_id]
-            )
-        else:
-            execute_query(
-                "UPDATE requests SET status = ?, worker_notes = ? WHERE id = ?;", 
-                [status, worker_notes, request_id]
-            )
-        
-        # If status changed and it's not the same as before, send email
-        if current_status and current_status != status:
-            send_status_update_email(request_id, status, worker_notes, worker_image_path)
-        
-        # If request is completed, set worker status back to Available
-        if status == "Completed":
-            worker_id = execute_query("SELECT workerID FROM requests WHERE id = ?;", [request_id], fetch=True)
-            if worker_id and worker_id["workerID"]:
+        with db_transaction():
+            # Get current status before update
+            current_request = execute_query("SELECT status, studentID, workerID, department, title FROM requests WHERE id = ?;", [request_id], fetch=True)
+            current_status = current_request["status"] if current_request else None
+            
+            # Update the request in the database with worker image
+            if worker_image_path:
                 execute_query(
-                    "UPDATE users SET status = 'Available' WHERE id = ?;", 
-                    [worker_id["workerID"]]
+                    "UPDATE requests SET status = ?, worker_notes = ?, worker_image_path = ? WHERE id = ?;", 
+                    [status, worker_notes, worker_image_path, request_id]
                 )
+            else:
+                execute_query(
+                    "UPDATE requests SET status = ?, worker_notes = ? WHERE id = ?;", 
+                    [status, worker_notes, request_id]
+                )
+            
+            # If status changed and it's not the same as before, queue email
+            email_queued = bool(current_status and current_status != status)
+            if email_queued:
+                queue_status_update_email(request_id, status, worker_notes, worker_image_path)
+                publish_event("request_status", [f"student:{current_request['studentID']}"],
+                              id=int(request_id), title=current_request["title"], status=status)
+                record_request_event(int(request_id), 'status', status, current_request["workerID"], current_request["department"])
+            
+            # If request is completed, set worker status back to Available
+            if status == "Completed":
+                worker_id = execute_query("SELECT workerID FROM requests WHERE id = ?;", [request_id], fetch=True)
+                if worker_id and worker_id["workerID"]:
+                    execute_query(
+                        "UPDATE users SET status = 'Available' WHERE id = ?;", 
+                        [worker_id["workerID"]]
+                    )
+            
+            # The worker's open task count or status changed
+            if current_request and (email_queued or status == "Completed"):
+                roster_changed([current_request["workerID"]])
+        
+        if email_queued:
+            wake_job('email_outbox')
+            live_events.wake()
+        if worker_image_path:
+            wake_job('image_derivatives')
         
         flash("Request updated successfully!", "success")
         return redirect("/worker")
@@ -1186,11 +4640,13 @@ def add_worker():
         
         try:
             # Hash password and create worker account
-            hashed_password = generate_password_hash(password)
-            execute_query(
-                "INSERT INTO users (username, email, password, role, department, status) VALUES (?, ?, ?, ?, ?, ?);", 
-                [username, email, hashed_password, "Worker", department, "Available"]
-            )
+            hashed_password = hash_password(password)
+            with db_transaction() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO users (username, email, password, role, department, status) VALUES (?, ?, ?, ?, ?, ?);", 
+                    [username, email, hashed_password, "Worker", department, "Available"]
+                )
+                roster_changed([cursor.lastrowid])
             
             flash("Worker account created successfully!", "success")
             print(f"DEBUG: Worker {username} created successfully")
@@ -1208,11 +4664,13 @@ def delete_worker(worker_id):
         flash("Access denied. Please login as an administrator.", "danger")
         return redirect("/")
     
-    # First, unassign any requests from this worker
-    execute_query("UPDATE requests SET workerID = NULL WHERE workerID = ?;", [worker_id])
-    
-    # Then delete the worker account
-    execute_query("DELETE FROM users WHERE id = ? AND role = 'Worker';", [worker_id])
+    with db_transaction():
+        # First, unassign any requests from this worker
+        execute_query("UPDATE requests SET workerID = NULL WHERE workerID = ?;", [worker_id])
+        
+        # Then delete the worker account
+        execute_query("DELETE FROM users WHERE id = ? AND role = 'Worker';", [worker_id])
+        roster_changed([worker_id])
     
     flash("Worker account deleted successfully!", "success")
     return redirect("/admin")
@@ -1233,7 +4691,7 @@ def reset_password():
     
     if request.method == "POST":
         new_password = request.form['new_password']
-        hashed_pw = generate_password_hash(new_password)
+        hashed_pw = hash_password(new_password)
         execute_query(
             "UPDATE users set password = ? WHERE username= ?;", 
             [hashed_pw, session["username"]]
@@ -1244,13 +4702,24 @@ def reset_password():
 # Start the scheduler
 scheduler = BackgroundScheduler()
 scheduler.add_job(func=check_for_pending_requests, trigger="interval", minutes=15)
-scheduler.start()
+scheduler.add_job(func=dispatch_email_outbox, trigger="interval", id='email_outbox',
+                  seconds=app.config['EMAIL_DISPATCH_INTERVAL_SECONDS'], max_instances=1, coalesce=True)
+scheduler.add_job(func=resume_broadcasts, trigger="interval", minutes=1, max_instances=1, coalesce=True)
+scheduler.add_job(func=generate_image_derivatives, trigger="interval", id='image_derivatives',
+                  minutes=10, max_instances=1, coalesce=True)
+scheduler.add_job(func=collect_upload_garbage, trigger="interval", minutes=30, max_instances=1, coalesce=True)
+scheduler.add_job(func=prune_live_events, trigger="interval", minutes=10, max_instances=1, coalesce=True)
+scheduler.add_job(func=archive_completed_requests, trigger="interval", hours=1, max_instances=1, coalesce=True)
+scheduler.add_job(func=compact_email_storage, trigger="interval", hours=24, max_instances=1, coalesce=True)
+scheduler.add_job(func=update_sla_rollups, trigger="interval", minutes=1, max_instances=1, coalesce=True)
+# Password hashing workers re-import the main module when it is this file (python app.py)
+if multiprocessing.parent_process() is None:
+    scheduler.start()
 
 # Shut down the scheduler when the app exits
-atexit.register(lambda: scheduler.shutdown())
+atexit.register(lambda: scheduler.shutdown() if scheduler.running else None)
 
 if __name__ == "__main__":
-    init_db()
-    migrate_db() 
+    migrate_db()
     check_db_schema()  
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+Load tests and benchmarks for CampusCare.
+
+Seeds a database with synthetic campus data through the app's own
+migrations, drives the main routes through the Flask test client and,
+optionally, through a local gunicorn with a threaded HTTP load generator.
+SMTP is replaced by a stub that accepts every message. Latency percentiles
+and throughput are written as JSON so runs can be compared.
+
+    python -m benchmarks --scale small
+    python -m benchmarks --scale campus --http --gunicorn-workers 4 --output results.json
+"""
@@ -0,0 +1,107 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.app_env import configure_environment, load_app
+from benchmarks.drivers import ROUTES, Scenarios, free_port, run_http_load, run_test_client, start_gunicorn
+from benchmarks.seed import SCALES, scale_counts, seed_database, seeded_counts
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Seed a synthetic campus and benchmark the routes.")
+    parser.add_argument('--db', help="database to seed or reuse (default: a fresh temporary file)")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    for name in ('students', 'workers', 'requests', 'lost-items', 'notifications'):
+        parser.add_argument(f'--{name}', type=int, help=f"override the number of {name.replace('-', ' ')} of --scale")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the data and the request mix")
+    parser.add_argument('--reseed', action='store_true', help="reseed --db even if it was seeded with the same counts")
+    parser.add_argument('--routes', default=','.join(ROUTES), help="comma-separated routes to drive")
+    parser.add_argument('--iterations', type=int, default=200, help="test client requests per route")
+    parser.add_argument('--http', action='store_true', help="also load-test a local gunicorn over HTTP")
+    parser.add_argument('--gunicorn-workers', type=int, default=4)
+    parser.add_argument('--gunicorn-threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=16, help="HTTP client threads")
+    parser.add_argument('--duration', type=float, default=30, help="seconds of HTTP load")
+    parser.add_argument('--output', default='-', help="file for the JSON results (default: stdout)")
+    return parser.parse_args(argv)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main(argv=None):
+    args = parse_args(argv)
+    routes = [name.strip() for name in args.routes.split(',') if name.strip()]
+    unknown = [name for name in routes if name not in ROUTES]
+    if unknown:
+        sys.exit(f"Unknown routes: {', '.join(unknown)} (known: {', '.join(ROUTES)})")
+
+    workdir = tempfile.mkdtemp(prefix='campuscare-bench-')
+    db_path = args.db or os.path.join(workdir, 'bench.db')
+    configure_environment(db_path, workdir)
+    counts = scale_counts(args.scale, students=args.students, workers=args.workers, requests=args.requests,
+                          lost_items=args.lost_items, notifications=args.notifications)
+
+    # The app logs every request and email with print(); keep stdout for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        app_module = load_app()
+        seeded = seeded_counts(db_path)
+        started = time.perf_counter()
+        if args.reseed or not seeded or seeded != {'counts': counts, 'seed': args.seed}:
+            print(f"Seeding {db_path}: {counts}")
+            seed_database(app_module, db_path, counts, seed=args.seed)
+            print(f"Seeded in {time.perf_counter() - started:.1f}s")
+        else:
+            app_module.migrate_db()
+
+        scenarios = Scenarios(db_path, seed=args.seed)
+        results = {
+            'meta': {
+                'started_at': datetime.now().isoformat(timespec='seconds'),
+                'git_revision': git_revision(),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'scale': args.scale,
+                'counts': counts,
+                'seed': args.seed,
+                'iterations': args.iterations,
+            },
+            'test_client': run_test_client(app_module, scenarios, routes, args.iterations),
+        }
+
+        if args.http:
+            port = free_port()
+            server = start_gunicorn(args.gunicorn_workers, args.gunicorn_threads, port)
+            try:
+                results['http'] = run_http_load(scenarios, routes, f'http://127.0.0.1:{port}',
+                                                args.concurrency, args.duration)
+            finally:
+                server.terminate()
+                server.wait()
+            results['meta'].update({
+                'gunicorn_workers': args.gunicorn_workers,
+                'gunicorn_threads': args.gunicorn_threads,
+                'concurrency': args.concurrency,
+                'duration': args.duration,
+            })
+
+    output = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
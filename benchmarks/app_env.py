@@ -0,0 +1,38 @@
+import importlib
+import os
+
+BENCH_PASSWORD = 'benchmark'
+
+class NullSMTP:
+    """Stand-in for smtplib.SMTP that accepts every message without a network round trip"""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send_message(self, msg):
+        self.sent += 1
+        return {}
+
+    def noop(self):
+        return (250, b'OK')
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+def configure_environment(db_path, workdir):
+    """Point the app at the benchmark database and keep its side files out of the repo"""
+    os.environ['DATABASE'] = os.path.abspath(db_path)
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['SLOW_QUERY_LOG'] = os.path.join(workdir, 'slow_queries.jsonl')
+    # Any non-default credentials make the outbox send, through the stub below
+    os.environ['MAIL_USERNAME'] = 'bench@campus.test'
+    os.environ['MAIL_PASSWORD'] = 'bench'
+
+def load_app():
+    """Import the app with SMTP stubbed out; configure_environment must run first"""
+    app_module = importlib.import_module('app')
+    app_module.smtp_pool.connect = NullSMTP
+    return app_module
@@ -0,0 +1,228 @@
+import http.cookiejar
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from benchmarks.app_env import BENCH_PASSWORD
+from benchmarks.seed import DEPARTMENTS, STATUSES
+
+# name: (role, method, path). Paths and form data for POSTs are filled in by
+# Scenarios.request() with ids picked from the seeded data.
+ROUTES = {
+    'index': (None, 'GET', '/'),
+    'student': ('Student', 'GET', '/student'),
+    'admin': ('Admin', 'GET', '/admin'),
+    'worker': ('Worker', 'GET', '/worker'),
+    'lost_found': ('Student', 'GET', '/lost-found'),
+    'email_notifications': ('Admin', 'GET', '/email-notifications'),
+    'workers_by_department': ('Admin', 'GET', '/get-workers-by-department/{department}'),
+    'assign_request': ('Admin', 'POST', '/assign-request'),
+    'update_request': ('Worker', 'POST', '/update-request'),
+}
+
+class Scenarios:
+    """Picks users and request ids from the seeded database for each simulated request"""
+
+    def __init__(self, db_path, seed=0):
+        import sqlite3
+        conn = sqlite3.connect(db_path)
+        self.users = {}
+        for user_id, email, username, role in conn.execute("SELECT id, email, username, role FROM users;"):
+            self.users.setdefault(role, []).append((user_id, email, username))
+        self.workers_by_department = {}
+        for worker_id, department in conn.execute("SELECT id, department FROM users WHERE role = 'Worker';"):
+            self.workers_by_department.setdefault(department, []).append(worker_id)
+        self.tasks = {}
+        for request_id, worker_id in conn.execute("SELECT id, workerID FROM requests WHERE workerID IS NOT NULL AND status != 'Completed';"):
+            self.tasks.setdefault(worker_id, []).append(request_id)
+        self.max_request_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM requests;").fetchone()[0]
+        conn.close()
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def user(self, role):
+        with self._lock:
+            return self.rng.choice(self.users[role])
+
+    def request(self, name, user):
+        """(method, path, form data) for one request of scenario name made by user"""
+        _, method, path = ROUTES[name]
+        with self._lock:
+            if name == 'workers_by_department':
+                return method, path.format(department=self.rng.choice(DEPARTMENTS)), None
+            if name == 'assign_request':
+                department = self.rng.choice(DEPARTMENTS)
+                workers = self.workers_by_department.get(department) or ['null']
+                return method, path, {
+                    'request_id': self.rng.randint(1, max(self.max_request_id, 1)),
+                    'worker_id': self.rng.choice(workers),
+                    'department': department,
+                    'status': self.rng.choice(STATUSES[1:]),
+                    'notes': 'Assigned by the benchmark',
+                }
+            if name == 'update_request':
+                tasks = self.tasks.get(user[0])
+                if not tasks:
+                    return None
+                return method, path, {
+                    'request_id': self.rng.choice(tasks),
+                    'status': self.rng.choice(STATUSES[1:]),
+                    'worker_notes': 'Updated by the benchmark',
+                }
+        return method, path, None
+
+def summarize(latencies, errors, elapsed):
+    """Latency percentiles in ms and throughput for one scenario"""
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    def percentile(fraction):
+        return round(latencies[min(count - 1, int(fraction * count))] * 1000, 2) if count else None
+
+    return {
+        'requests': count,
+        'errors': errors,
+        'mean_ms': round(sum(latencies) / count * 1000, 2) if count else None,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(latencies[-1] * 1000, 2) if count else None,
+        'throughput_rps': round(count / elapsed, 1) if elapsed else None,
+    }
+
+def run_test_client(app_module, scenarios, routes, iterations, warmup=5):
+    """Drive each route in turn through the Flask test client; returns {route: summary}"""
+    client = app_module.app.test_client()
+    results = {}
+    for name in routes:
+        role = ROUTES[name][0]
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for i in range(warmup + iterations):
+            if i == warmup:  # discard the warm-up requests
+                latencies, errors = [], 0
+                started = time.perf_counter()
+            with client.session_transaction() as session:
+                session.clear()
+                if role:
+                    user = scenarios.user(role)
+                    session['user_id'], session['username'], session['role'] = user[0], user[2], role
+                else:
+                    user = None
+            planned = scenarios.request(name, user)
+            if planned is None:
+                continue
+            method, path, data = planned
+            request_started = time.perf_counter()
+            response = client.open(path, method=method, data=data)
+            latencies.append(time.perf_counter() - request_started)
+            response.close()
+            if response.status_code >= 400:
+                errors += 1
+        results[name] = summarize(latencies, errors, time.perf_counter() - started)
+    return results
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_gunicorn(workers, threads, port):
+    """Start gunicorn on benchmarks.wsgi:app and wait until it answers"""
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'benchmarks.wsgi:app'],
+        cwd=repo, stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1).close()
+            return server
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not start within 30 seconds")
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses instead of following them, like the test client"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+def http_login(base_url, role, user):
+    """Log in over HTTP with the seeded password; returns an opener carrying the session cookie"""
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect
+    )
+    if role is None:
+        return opener
+    fields = {'Admin': ('adminID', 'adminPass'), 'Student': ('studentID', 'studentPass'), 'Worker': ('workerID', 'workerPass')}[role]
+    email_field, password_field = fields
+    password = 'admin123' if role == 'Admin' else BENCH_PASSWORD
+    body = urllib.parse.urlencode({email_field: user[1], password_field: password}).encode()
+    try:
+        opener.open(base_url + '/', body, timeout=30).close()
+    except urllib.error.HTTPError as e:
+        if e.code != 302:
+            raise
+    return opener
+
+def run_http_load(scenarios, routes, base_url, concurrency, duration):
+    """Hit the routes round-robin from concurrency threads for duration seconds; returns {route: summary}"""
+    latencies = {name: [] for name in routes}
+    errors = {name: 0 for name in routes}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        openers = {}
+        users = {}
+        for role in {ROUTES[name][0] for name in routes}:
+            users[role] = scenarios.user(role) if role else None
+            openers[role] = http_login(base_url, role, users[role])
+        i = offset
+        while time.perf_counter() < deadline:
+            name = routes[i % len(routes)]
+            i += 1
+            role = ROUTES[name][0]
+            planned = scenarios.request(name, users[role])
+            if planned is None:
+                continue
+            method, path, data = planned
+            body = urllib.parse.urlencode(data).encode() if data is not None else None
+            started = time.perf_counter()
+            failed = False
+            try:
+                openers[role].open(base_url + path, body, timeout=60).read()
+            except urllib.error.HTTPError as e:
+                failed = e.code >= 400
+            except OSError:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[name].append(elapsed)
+                errors[name] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = {name: summarize(latencies[name], errors[name], elapsed) for name in routes}
+    results['total'] = summarize([value for values in latencies.values() for value in values],
+                                 sum(errors.values()), elapsed)
+    return results
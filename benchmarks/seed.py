@@ -0,0 +1,122 @@
+import json
+import os
+import random
+from datetime import date, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.app_env import BENCH_PASSWORD
+
+SCALES = {
+    # name: (students, workers, requests, lost items, email notifications)
+    'tiny': (200, 10, 1_000, 100, 1_000),
+    'small': (2_000, 50, 10_000, 1_000, 10_000),
+    'campus': (50_000, 500, 200_000, 20_000, 200_000),
+}
+
+DEPARTMENTS = ['Electrical', 'Plumbing', 'Carpentry', 'HVAC', 'General Maintenance']
+ISSUES = {
+    'Electrical': ['Flickering lights', 'Power socket not working', 'Ceiling fan broken', 'Tripped breaker'],
+    'Plumbing': ['Leaking tap', 'Blocked drain', 'No hot water', 'Toilet not flushing'],
+    'Carpentry': ['Broken door hinge', 'Wobbly desk', 'Window frame stuck', 'Cupboard lock broken'],
+    'HVAC': ['AC not cooling', 'Heater making noise', 'Ventilation blocked', 'Thermostat faulty'],
+    'General Maintenance': ['Broken chair', 'Pest problem', 'Wall paint peeling', 'Notice board loose'],
+}
+BUILDINGS = ['CS Block', 'Library', 'Hostel A', 'Hostel B', 'Main Building', 'Sports Complex', 'Cafeteria']
+LOST_ITEMS = ['Water bottle', 'Calculator', 'ID card', 'Umbrella', 'Laptop charger', 'Notebook', 'Earphones', 'Wallet']
+STATUSES = ['Pending', 'In Progress', 'Completed']
+STATUS_WEIGHTS = [3, 2, 5]
+PRIORITIES = ['Low', 'Medium', 'High']
+
+def scale_counts(scale, **overrides):
+    students, workers, requests, lost_items, notifications = SCALES[scale]
+    counts = {
+        'students': students,
+        'workers': workers,
+        'requests': requests,
+        'lost_items': lost_items,
+        'notifications': notifications,
+    }
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+def seed_database(app_module, db_path, counts, seed=0, days=365):
+    """Create db_path with the app's migrations and fill it with synthetic rows; returns the row counts"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    app_module.migrate_db()
+
+    rng = random.Random(seed)
+    today = date.today()
+    # One hash for everybody: hashing 50k passwords would dominate the seeding time
+    password = generate_password_hash(BENCH_PASSWORD, app_module.app.config['PASSWORD_HASH_METHOD'])
+
+    def random_day():
+        return (today - timedelta(days=rng.randrange(days))).strftime("%Y-%m-%d")
+
+    conn = app_module.open_db_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, 'Student');",
+            ((f"student{i}", f"student{i}@campus.test", password) for i in range(counts['students']))
+        )
+        conn.executemany(
+            "INSERT INTO users (username, email, password, role, department, status) VALUES (?, ?, ?, 'Worker', ?, 'Available');",
+            ((f"worker{i}", f"worker{i}@campus.test", password, DEPARTMENTS[i % len(DEPARTMENTS)])
+             for i in range(counts['workers']))
+        )
+        students = [row[0] for row in conn.execute("SELECT id FROM users WHERE role = 'Student';")]
+        workers = {}
+        for worker_id, department in conn.execute("SELECT id, department FROM users WHERE role = 'Worker';"):
+            workers.setdefault(department, []).append(worker_id)
+
+        def request_rows():
+            for _ in range(counts['requests']):
+                department = rng.choice(DEPARTMENTS)
+                status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+                worker_id = rng.choice(workers[department]) if status != 'Pending' and workers.get(department) else None
+                title = rng.choice(ISSUES[department])
+                location = f"{rng.choice(BUILDINGS)} room {rng.randint(1, 450)}"
+                yield (rng.choice(students), title, location, status, rng.choice(PRIORITIES),
+                       f"{title} in {location}, reported by a student.", random_day(), worker_id,
+                       department if worker_id else None)
+
+        conn.executemany("""
+            INSERT INTO requests (studentID, title, location, status, priority, description, date, workerID, department)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """, request_rows())
+
+        conn.executemany("""
+            INSERT INTO lost_items (studentID, item_name, description, location_found, date_found, status, contact_info)
+            VALUES (?, ?, ?, ?, ?, ?, ?);
+        """, ((rng.choice(students), item, f"{item} found near the entrance.", rng.choice(BUILDINGS), random_day(),
+               rng.choice(['Unclaimed', 'Unclaimed', 'Claimed']), f"Front desk, {rng.choice(BUILDINGS)}")
+              for item in (rng.choice(LOST_ITEMS) for _ in range(counts['lost_items']))))
+
+        request_count = counts['requests']
+
+        def notification_rows():
+            for _ in range(counts['notifications']):
+                request_id = rng.randint(1, request_count) if request_count else None
+                body = f"<p>Your request #{request_id} is now {rng.choice(STATUSES)}.</p>"
+                yield (request_id, rng.choice(students), f"Request #{request_id} status update",
+                       app_module.store_email_body(body, conn), random_day())
+
+        conn.executemany("""
+            INSERT INTO email_notifications (request_id, recipient_id, subject, message, body_hash, sent_date, status)
+            VALUES (?, ?, ?, '', ?, ?, 'Sent');
+        """, notification_rows())
+    conn.close()
+
+    with open(db_path + '.json', 'w') as f:
+        json.dump({'counts': counts, 'seed': seed}, f)
+    return counts
+
+def seeded_counts(db_path):
+    """Counts a database was seeded with, or None if it was not seeded by seed_database"""
+    try:
+        with open(db_path + '.json') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,4 @@
+"""gunicorn entry point for HTTP load tests: benchmarks.wsgi:app"""
+from benchmarks.app_env import load_app
+
+app = load_app().app
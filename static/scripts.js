@@ -88,6 +88,7 @@ document.addEventListener("DOMContentLoaded", () => {
         window.requests.forEach((req) => {
             const card = document.createElement("div");
             card.classList.add("col-12", "col-md-6", "col-lg-6");
+            card.dataset.requestId = req.id;
             card.style.zIndex = "1";
             
             let statusColorClass = "";
@@ -111,7 +112,7 @@ document.addEventListener("DOMContentLoaded", () => {
             let imageHtml = '';
             if (req.image_path) {
                 imageHtml = `
-                    <button class="btn btn-secondary btn-sm" data-bs-toggle="modal" data-bs-target="#imageModal" data-image-path="${req.image_path}">
+                    <button class="btn btn-secondary btn-sm" data-bs-toggle="modal" data-bs-target="#imageModal" data-image-path="${req.image_preview || req.image_path}">
                         <i class="bi bi-paperclip"></i> View Attachment
                     </button>
                 `;
@@ -299,6 +300,77 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Live updates over Server-Sent Events. Pages pass one handler per event
+// type; the browser reconnects by itself and resumes after the last event id.
+function subscribeToLiveEvents(handlers, lastEventId) {
+    if (!window.EventSource) {
+        return;
+    }
+    const source = new EventSource('/events' + (lastEventId ? '?last_event_id=' + lastEventId : ''));
+    Object.keys(handlers).forEach((type) => {
+        source.addEventListener(type, (event) => {
+            lastEventId = event.lastEventId;
+            handlers[type](JSON.parse(event.data));
+        });
+    });
+    source.onerror = () => {
+        // A refused connection (e.g. the server is at its connection cap) is not retried by the browser
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(() => subscribeToLiveEvents(handlers, lastEventId), 30000);
+        }
+    };
+}
+
+// Update the status badge of a request card in place
+function updateStatusBadge(requestId, status) {
+    const styles = {
+        "Pending": ["bg-secondary", "bi-exclamation-circle"],
+        "In Progress": ["bg-primary", "bi-hourglass-split"],
+        "Completed": ["bg-success", "bi-check-circle"]
+    };
+    const [colorClass, iconClass] = styles[status] || ["bg-info", "bi-question-circle"];
+
+    document.querySelectorAll(`[data-request-id="${requestId}"] .badge`).forEach((badge) => {
+        badge.classList.remove("bg-secondary", "bg-primary", "bg-success", "bg-info");
+        badge.classList.add(colorClass);
+        const icon = badge.querySelector("i");
+        if (icon) {
+            icon.className = `text-white ${iconClass}`;
+            badge.replaceChildren(icon, ` ${status}`);
+        } else {
+            badge.textContent = status;
+        }
+    });
+}
+
+// Show a dismissible notice, e.g. for a new assignment or a new lost item
+function showLiveNotice(containerId, message, linkText, linkHref) {
+    const container = document.getElementById(containerId);
+    if (!container) {
+        return;
+    }
+    const notice = document.createElement("div");
+    notice.className = "alert alert-info alert-dismissible fade show";
+    notice.setAttribute("role", "alert");
+    notice.append(message + " ");
+
+    if (linkText) {
+        const link = document.createElement("a");
+        link.className = "alert-link";
+        link.href = linkHref;
+        link.textContent = linkText;
+        notice.append(link);
+    }
+
+    const close = document.createElement("button");
+    close.type = "button";
+    close.className = "btn-close";
+    close.setAttribute("data-bs-dismiss", "alert");
+    close.setAttribute("aria-label", "Close");
+    notice.append(close);
+    container.prepend(notice);
+}
+
 // Send status update email
 function sendStatusUpdate(requestId) {
     fetch('/send-status-update/' + requestId, {
@@ -0,0 +1,109 @@
+import importlib
+import os
+import shutil
+import socketserver
+import sys
+import threading
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The app, pointed at a migrated copy of database.db in a temporary directory"""
+    workdir = tmp_path_factory.mktemp("campuscare")
+    db_path = workdir / "database.db"
+    shutil.copy(os.path.join(REPO_ROOT, "database.db"), db_path)
+    os.environ['DATABASE'] = str(db_path)
+    os.environ['METRICS_DIR'] = str(workdir / "metrics")
+    os.environ['SLOW_QUERY_LOG'] = str(workdir / "slow_queries.jsonl")
+    app_module = importlib.import_module('app')
+    app_module.app.config['TESTING'] = True
+    with app_module.app.app_context():
+        app_module.migrate_db()
+    return app_module
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: no TLS, no AUTH, every message kept in memory"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 stub ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode().split(" ", 1)[0].strip().upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-stub")
+                self.reply("250 8BITMIME")
+            elif verb == "MAIL" and server.drop_next:
+                server.drop_next = False
+                return  # hang up as if the server timed the connection out
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "DATA" and server.reject_data:
+                self.reply("554 Transaction failed")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data in iter(self.rfile.readline, b""):
+                    if data == b".\r\n":
+                        break
+                    lines.append(data)
+                server.messages.append(b"".join(lines).decode())
+                self.reply("250 OK queued")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.reject_data = False
+        self.drop_next = False
+
+@pytest.fixture
+def smtp_server(app_module, monkeypatch):
+    """A local stub SMTP server the app's mail settings point at; the scheduler is paused meanwhile"""
+    server = StubSMTPServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for key, value in {'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': server.server_address[1], 'MAIL_USE_TLS': False,
+                       'MAIL_USERNAME': 'campuscare@campus.test', 'MAIL_PASSWORD': 'stub', 'MAIL_TIMEOUT': 5}.items():
+        monkeypatch.setitem(app_module.app.config, key, value)
+    app_module.scheduler.pause()
+    app_module.smtp_pool.close_all()
+    yield server
+    app_module.smtp_pool.close_all()
+    app_module.scheduler.resume()
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def login(app_module):
+    """Return a test client logged in as the first user with the given role"""
+    def login(role):
+        with app_module.app.app_context():
+            user = app_module.execute_query("SELECT id, username FROM users WHERE role = ? ORDER BY id LIMIT 1;", [role], fetch=True)
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'], session['username'], session['role'] = user['id'], user['username'], role
+        return client, user['id']
+    return login
+
+@pytest.fixture
+def admin_client(login):
+    return login('Admin')[0]
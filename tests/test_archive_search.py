@@ -0,0 +1,20 @@
+def test_archived_request_stays_searchable(app_module, admin_client):
+    with app_module.app.app_context():
+        student = app_module.execute_query("SELECT id FROM users WHERE role = 'Student' LIMIT 1;", fetch=True)
+        with app_module.db_transaction() as conn:
+            request_id = conn.execute("""
+                INSERT INTO requests (studentID, title, location, status, priority, description, date)
+                VALUES (?, 'Flickering corridor lamp', 'Hostel B', 'Completed', 'Low', 'Lamp outside room 12', '2000-01-01');
+            """, [student['id']]).lastrowid
+    app_module.archive_completed_requests()
+
+    with app_module.app.app_context():
+        assert app_module.execute_query("SELECT 1 FROM requests WHERE id = ?;", [request_id], fetch=True) is None
+        assert app_module.execute_query("SELECT 1 FROM requests_archive WHERE id = ?;", [request_id], fetch=True)
+
+    results = admin_client.get("/search", query_string={"q": "flickering lamp"}).get_json()["results"]
+    assert [(result['id'], result['archived']) for result in results] == [(request_id, 1)]
+
+    archive_page = admin_client.get("/admin/archive", query_string={"q": "corridor"}).get_json()
+    assert "Flickering corridor lamp" in archive_page["rows_html"]
+    assert "Flickering corridor lamp" not in admin_client.get("/admin/archive", query_string={"q": "plumbing"}).get_json()["rows_html"]
@@ -0,0 +1,24 @@
+def test_flash_after_a_write_does_not_disable_etags(app_module, login):
+    client, worker_id = login('Worker')
+    with app_module.app.app_context():
+        student = app_module.execute_query("SELECT id FROM users WHERE role = 'Student' LIMIT 1;", fetch=True)
+        with app_module.db_transaction() as conn:
+            request_id = conn.execute("""
+                INSERT INTO requests (studentID, title, location, status, priority, description, date, workerID)
+                VALUES (?, 'Broken window latch', 'Library', 'Pending', 'Medium', 'Second floor', '2026-10-01', ?);
+            """, [student['id'], worker_id]).lastrowid
+
+    response = client.post("/update-request", data={"request_id": request_id, "status": "In Progress", "worker_notes": "On it"})
+    assert response.status_code == 302
+
+    # The first page after the write shows the flash and is not cached
+    first = client.get("/worker")
+    assert first.status_code == 200
+    assert b"Request updated successfully!" in first.data
+    with client.session_transaction() as session:
+        assert not session.get('_flashes')
+
+    second = client.get("/worker")
+    assert second.status_code == 200 and second.headers.get("ETag")
+    third = client.get("/worker", headers={"If-None-Match": second.headers["ETag"]})
+    assert third.status_code == 304
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+def queue_email(app_module, subject):
+    """Queue one notification email and return its outbox row id"""
+    with app_module.app.app_context():
+        student = app_module.execute_query("SELECT id, email FROM users WHERE role = 'Student' LIMIT 1;", fetch=True)
+        with app_module.db_transaction() as conn:
+            app_module.queue_notification_batch([{
+                'request_id': None, 'recipient_id': student['id'], 'to_email': student['email'],
+                'subject': subject, 'message': f"<p>{subject}</p>", 'attachment_path': None,
+            }])
+            return conn.execute("SELECT MAX(id) FROM email_outbox;").fetchone()[0]
+
+def outbox_row(app_module, outbox_id):
+    with app_module.app.app_context():
+        return dict(app_module.execute_query("""
+            SELECT o.status, o.attempts, o.locked_until, o.next_attempt_at, o.last_error, n.status as notification_status
+            FROM email_outbox o JOIN email_notifications n ON n.id = o.notification_id WHERE o.id = ?;
+        """, [outbox_id], fetch=True))
+
+def test_outbox_leases_sends_and_marks_sent(app_module, smtp_server):
+    outbox_id = queue_email(app_module, "Outbox delivery check")
+    app_module.dispatch_email_outbox()
+
+    row = outbox_row(app_module, outbox_id)
+    assert (row['status'], row['attempts'], row['locked_until'], row['notification_status']) == ('Sent', 1, None, 'Sent')
+    sent = [message for message in smtp_server.messages if "Subject: Outbox delivery check" in message]
+    assert len(sent) == 1 and "Message-ID: <" in sent[0]
+
+    # A second run has nothing left to send
+    app_module.dispatch_email_outbox()
+    assert len([message for message in smtp_server.messages if "Subject: Outbox delivery check" in message]) == 1
+
+def test_outbox_skips_rows_leased_by_another_process(app_module, smtp_server):
+    outbox_id = queue_email(app_module, "Outbox lease check")
+    with app_module.app.app_context():
+        app_module.execute_query("UPDATE email_outbox SET status = 'Sending', locked_until = ? WHERE id = ?;",
+                                 [time.time() + 60, outbox_id])
+    app_module.dispatch_email_outbox()
+    assert outbox_row(app_module, outbox_id)['status'] == 'Sending'
+    assert not [message for message in smtp_server.messages if "Subject: Outbox lease check" in message]
+
+def test_outbox_retries_a_failed_send_with_backoff(app_module, smtp_server):
+    outbox_id = queue_email(app_module, "Outbox retry check")
+    smtp_server.reject_data = True
+    before = time.time()
+    app_module.dispatch_email_outbox()
+
+    row = outbox_row(app_module, outbox_id)
+    assert (row['status'], row['attempts'], row['locked_until'], row['notification_status']) == ('Queued', 1, None, 'Queued')
+    assert "554" in row['last_error']
+    base = app_module.app.config['EMAIL_RETRY_BASE_SECONDS']
+    assert before + 0.8 * base <= row['next_attempt_at'] <= time.time() + 1.2 * base
+
+    # Not due yet, so the next run leaves it alone; once due it goes out
+    smtp_server.reject_data = False
+    app_module.dispatch_email_outbox()
+    assert outbox_row(app_module, outbox_id)['attempts'] == 1
+    with app_module.app.app_context():
+        app_module.execute_query("UPDATE email_outbox SET next_attempt_at = ? WHERE id = ?;", [time.time(), outbox_id])
+    app_module.dispatch_email_outbox()
+    row = outbox_row(app_module, outbox_id)
+    assert (row['status'], row['attempts'], row['notification_status']) == ('Sent', 2, 'Sent')
+
+@pytest.fixture
+def pool(app_module, smtp_server):
+    pool = app_module.SMTPConnectionPool(app_module.open_smtp_connection, max_size=2, max_messages=2,
+                                         keepalive=30, max_idle=240)
+    yield pool
+    pool.close_all()
+
+def send(app_module, pool, subject):
+    pool.send(app_module.build_email_message("someone@campus.test", subject, "<p>Hello</p>"))
+
+def test_pool_reuses_connections_until_max_messages(app_module, smtp_server, pool):
+    for i in range(5):
+        send(app_module, pool, f"Pool reuse {i}")
+    assert len(smtp_server.messages) == 5
+    assert smtp_server.connections == 3  # two messages per connection
+
+def test_pool_reconnects_when_the_server_hangs_up(app_module, smtp_server, pool):
+    send(app_module, pool, "Before hang-up")
+    smtp_server.drop_next = True
+    send(app_module, pool, "After hang-up")
+    assert smtp_server.connections == 2
+    assert ["Subject: After hang-up" in message for message in smtp_server.messages] == [False, True]
+
+def test_pool_checks_idle_connections_before_reuse(app_module, smtp_server, pool):
+    send(app_module, pool, "First")
+    pool.keepalive = 0  # every idle connection now gets a NOOP first
+    send(app_module, pool, "Second")
+    assert smtp_server.connections == 1
+    pool.max_idle = -1  # and now every idle connection is too old to reuse
+    send(app_module, pool, "Third")
+    assert smtp_server.connections == 2
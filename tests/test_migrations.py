@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.seed import scale_counts, seed_database
+
+@pytest.fixture
+def empty_database(app_module, tmp_path, monkeypatch):
+    """Point the app at a database file that does not exist yet"""
+    db_path = str(tmp_path / "migrations.db")
+    monkeypatch.setitem(app_module.app.config, 'DATABASE', db_path)
+    return db_path
+
+def plan_checks(app_module):
+    return [(version, query) for version, _, _, checks in app_module.MIGRATIONS for query in checks]
+
+def test_migrations_apply_in_order_with_their_plan_checks(app_module, empty_database):
+    versions = [version for version, _, _, _ in app_module.MIGRATIONS]
+    assert app_module.migrate_db() == versions
+    assert app_module.migrate_db() == []
+
+    conn = app_module.open_db_connection()
+    try:
+        assert sorted(app_module.applied_migrations(conn)) == versions
+        app_module.verify_query_plans(conn, [query for _, query in plan_checks(app_module)])
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize("analyze", [False, True], ids=["no-statistics", "analyzed"])
+def test_plan_checks_hold_on_a_populated_database(app_module, empty_database, analyze):
+    seed_database(app_module, empty_database, scale_counts('tiny'))
+    conn = app_module.open_db_connection()
+    try:
+        if analyze:
+            conn.execute("ANALYZE;")
+        problems = {}
+        for version, query in plan_checks(app_module):
+            found = app_module.query_plan_problems(conn, query)
+            if found:
+                problems[(version, " ".join(query.split()))] = found
+        assert problems == {}
+    finally:
+        conn.close()
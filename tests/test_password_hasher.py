@@ -0,0 +1,18 @@
+import time
+
+import pytest
+
+@pytest.fixture
+def hasher(app_module):
+    hasher = app_module.PasswordHasher('pbkdf2:sha256:1000', workers=1, queue_limit=4, timeout=0.5)
+    yield hasher
+    hasher.shutdown()
+
+def test_timed_out_hash_counts_as_rejected_only(app_module, hasher):
+    hasher._run(time.sleep, 0)
+    with pytest.raises(app_module.PasswordHasherBusy):
+        hasher._run(time.sleep, 2)
+
+    stats = hasher.stats()
+    assert (stats['completed'], stats['rejected'], stats['in_flight']) == (1, 1, 0)
+    assert len(hasher._latencies) == 1
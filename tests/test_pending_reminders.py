@@ -0,0 +1,51 @@
+import pytest
+
+@pytest.fixture
+def reminders(app_module, monkeypatch):
+    """Run the pending-request reminder job on demand; returns the counts it emailed about"""
+    sent = []
+    monkeypatch.setattr(app_module, 'send_email', lambda to, subject, message: sent.append(int(subject.split(": ")[1].split()[0])) or True)
+    app_module.scheduler.pause()
+
+    def run():
+        with app_module.app.app_context():
+            app_module.execute_query("UPDATE job_leases SET last_started_at = NULL WHERE job = 'check_for_pending_requests';")
+        del sent[:]
+        app_module.check_for_pending_requests()
+        return sent[0] if sent else 0
+
+    run()  # catch up with whatever is pending already
+    yield run
+    app_module.scheduler.resume()
+
+def update_request(app_module, request_id, **columns):
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    with app_module.app.app_context():
+        app_module.execute_query(f"UPDATE requests SET {assignments} WHERE id = ?;", [*columns.values(), request_id])
+
+def test_requests_that_become_pending_again_are_reported(app_module, reminders):
+    with app_module.app.app_context():
+        student = app_module.execute_query("SELECT id FROM users WHERE role = 'Student' LIMIT 1;", fetch=True)
+        workers = [row['id'] for row in app_module.execute_query("SELECT id FROM users WHERE role = 'Worker' LIMIT 2;", fetchall=True)]
+        with app_module.db_transaction() as conn:
+            request_id = conn.execute("""
+                INSERT INTO requests (studentID, title, location, status, priority, description, date)
+                VALUES (?, 'Flickering light', 'Hall B', 'Pending', 'Low', 'Corridor', '2026-10-03');
+            """, [student['id']]).lastrowid
+
+    assert reminders() == 1
+    assert reminders() == 0
+
+    # Reopened
+    update_request(app_module, request_id, status='In Progress', workerID=workers[0])
+    assert reminders() == 0
+    update_request(app_module, request_id, status='Pending')
+    assert reminders() == 1
+
+    # Reassigned while still pending
+    update_request(app_module, request_id, workerID=workers[1])
+    assert reminders() == 1
+
+    # Other edits are not news
+    update_request(app_module, request_id, notes='Bulb ordered')
+    assert reminders() == 0
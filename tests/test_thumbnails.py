@@ -0,0 +1,27 @@
+def test_listings_show_thumbnails_and_link_the_preview(app_module, login):
+    client, student_id = login('Student')
+    with app_module.app.app_context():
+        with app_module.db_transaction() as conn:
+            request_id = conn.execute("""
+                INSERT INTO requests (studentID, title, location, status, priority, description, date,
+                                      image_path, image_thumb, image_preview)
+                VALUES (?, 'Leaking tap', 'Block C', 'Pending', 'Low', 'Kitchen sink', '2026-10-02',
+                        'ab/request.jpg', 'ab/request_thumb.jpg', 'ab/request_preview.jpg');
+            """, [student_id]).lastrowid
+            conn.execute("""
+                INSERT INTO lost_items (item_name, description, location_found, contact_info, studentID, date_found, status,
+                                        image_path, image_thumb, image_preview)
+                VALUES ('Blue umbrella', 'Folding', 'Cafeteria', 'ext 12', ?, '2026-10-02', 'Unclaimed',
+                        'cd/item.jpg', 'cd/item_thumb.jpg', 'cd/item_preview.jpg');
+            """, [student_id])
+
+    page = client.get("/lost-found").get_data(as_text=True)
+    assert 'src="/static/uploads/cd/item_thumb.jpg"' in page
+    assert 'data-image-path="cd/item_preview.jpg"' in page
+    assert 'src="/static/uploads/cd/item.jpg"' not in page
+
+    admin_client = login('Admin')[0]
+    modals = admin_client.get("/admin/requests", query_string={"format": "html", "q": "Leaking tap"}).get_json()["modals_html"]
+    assert f'id="detailModal{request_id}"' in modals
+    assert 'src="/static/uploads/ab/request_thumb.jpg"' in modals
+    assert 'href="/static/uploads/ab/request_preview.jpg"' in modals